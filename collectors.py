@@ -1,13 +1,18 @@
 import os
 import re
 import time
-import datetime
-from typing import List, Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Dict, Any
 
 import requests
 
 UA = "goliath-collector/1.0"
 TIMEOUT = 20
+QUERY_WORKERS = max(1, int(os.getenv("COLLECT_QUERY_WORKERS") or "8"))  # クエリの同時実行数
+
+# at://<did>/app.bsky.feed.post/<rkey>
+BSKY_POST_URI_RE = re.compile(r"^at://[^/]+/app\.bsky\.feed\.post/(?P<rkey>[^/]+)$")
+HTML_TAG_RE = re.compile(r"<[^>]+>")
 
 DEFAULT_QUERIES = [
     "how do i", "how to", "error", "issue", "problem", "can't", "doesn't work",
@@ -16,24 +21,31 @@ DEFAULT_QUERIES = [
 
 
 def _days_ago_ts(days: int) -> int:
-    dt = datetime.datetime.utcnow() - datetime.timedelta(days=days)
-    return int(dt.timestamp())
+    # epoch 秒は UTC 基準なので datetime を経由せずに引き算する
+    return int(time.time()) - days * 86400
 
 
 def _dedup(items: List[Dict[str, str]]) -> List[Dict[str, str]]:
-    seen = set()
-    out: List[Dict[str, str]] = []
+    # dict は挿入順を保持するので、最初に出たものだけ残る
+    uniq: Dict[str, Dict[str, str]] = {}
     for it in items:
         text = (it.get("text") or "").strip()
         url = (it.get("url") or "").strip()
         platform = (it.get("platform") or "").strip()
         if not text or not url or not platform:
             continue
-        key = url + "|" + platform + "|" + text[:160]
-        if key in seen:
-            continue
-        seen.add(key)
-        out.append(it)
+        uniq.setdefault(url + "|" + platform + "|" + text[:160], it)
+    return list(uniq.values())
+
+
+def _fan_out(fetch: Callable[[str], List[Dict[str, str]]], queries: List[str]) -> List[Dict[str, str]]:
+    # クエリ同士は独立した I/O 待ちなので並列に投げ、結果はクエリ順に連結する
+    if not queries:
+        return []
+    out: List[Dict[str, str]] = []
+    with ThreadPoolExecutor(max_workers=min(len(queries), QUERY_WORKERS)) as ex:
+        for got in ex.map(fetch, queries):
+            out += got
     return out
 
 
@@ -42,10 +54,10 @@ def collect_hn(queries: List[str], days_back: int, limit_per_query: int) -> List
     session.headers.update({"User-Agent": UA})
 
     min_ts = _days_ago_ts(days_back)
-    out: List[Dict[str, str]] = []
     api = "https://hn.algolia.com/api/v1/search_by_date"
 
-    for q in queries:
+    def one(q: str) -> List[Dict[str, str]]:
+        out: List[Dict[str, str]] = []
         params = {
             "query": q,
             "tags": "(story,comment)",
@@ -57,7 +69,7 @@ def collect_hn(queries: List[str], days_back: int, limit_per_query: int) -> List
             r.raise_for_status()
             data = r.json()
         except Exception:
-            continue
+            return []
 
         for h in (data.get("hits") or []):
             title = (h.get("title") or "").strip()
@@ -74,9 +86,9 @@ def collect_hn(queries: List[str], days_back: int, limit_per_query: int) -> List
             hn_url = f"https://news.ycombinator.com/item?id={object_id}"
             out.append({"text": text, "url": hn_url, "platform": "hn"})
 
-        time.sleep(0.2)
+        return out
 
-    return _dedup(out)
+    return _dedup(_fan_out(one, queries))
 
 
 def collect_bluesky(queries: List[str], limit_per_query: int) -> List[Dict[str, str]]:
@@ -84,16 +96,16 @@ def collect_bluesky(queries: List[str], limit_per_query: int) -> List[Dict[str,
     session.headers.update({"User-Agent": UA})
 
     base = "https://public.api.bsky.app/xrpc/app.bsky.feed.searchPosts"
-    out: List[Dict[str, str]] = []
 
-    for q in queries:
+    def one(q: str) -> List[Dict[str, str]]:
+        out: List[Dict[str, str]] = []
         params = {"q": q, "limit": str(limit_per_query)}
         try:
             r = session.get(base, params=params, timeout=TIMEOUT)
             r.raise_for_status()
             data = r.json()
         except Exception:
-            continue
+            return []
 
         for p in (data.get("posts") or []):
             record = p.get("record") or {}
@@ -105,9 +117,8 @@ def collect_bluesky(queries: List[str], limit_per_query: int) -> List[Dict[str,
             author = p.get("author") or {}
             handle = author.get("handle") or ""
 
-            rkey = ""
-            if uri and "/app.bsky.feed.post/" in uri:
-                rkey = uri.split("/app.bsky.feed.post/")[-1]
+            m = BSKY_POST_URI_RE.match(uri)
+            rkey = m.group("rkey") if m else ""
 
             if handle and rkey:
                 url = f"https://bsky.app/profile/{handle}/post/{rkey}"
@@ -116,9 +127,9 @@ def collect_bluesky(queries: List[str], limit_per_query: int) -> List[Dict[str,
 
             out.append({"text": text, "url": url, "platform": "bluesky"})
 
-        time.sleep(0.2)
+        return out
 
-    return _dedup(out)
+    return _dedup(_fan_out(one, queries))
 
 
 def collect_mastodon(queries: List[str], limit_per_query: int) -> List[Dict[str, str]]:
@@ -130,10 +141,10 @@ def collect_mastodon(queries: List[str], limit_per_query: int) -> List[Dict[str,
     session = requests.Session()
     session.headers.update({"User-Agent": UA, "Authorization": f"Bearer {token}"})
 
-    out: List[Dict[str, str]] = []
+    url = f"{api_base}/api/v2/search"
 
-    for q in queries:
-        url = f"{api_base}/api/v2/search"
+    def one(q: str) -> List[Dict[str, str]]:
+        out: List[Dict[str, str]] = []
         params = {
             "q": q,
             "type": "statuses",
@@ -145,7 +156,7 @@ def collect_mastodon(queries: List[str], limit_per_query: int) -> List[Dict[str,
             r.raise_for_status()
             data = r.json()
         except Exception:
-            continue
+            return []
 
         for s in (data.get("statuses") or []):
             content = (s.get("content") or "").strip()
@@ -153,7 +164,7 @@ def collect_mastodon(queries: List[str], limit_per_query: int) -> List[Dict[str,
                 continue
 
             txt = content.replace("<br />", "\n").replace("<br/>", "\n").replace("<br>", "\n")
-            txt = re.sub(r"<[^>]+>", "", txt).strip()
+            txt = HTML_TAG_RE.sub("", txt).strip()
             if not txt:
                 continue
 
@@ -163,9 +174,9 @@ def collect_mastodon(queries: List[str], limit_per_query: int) -> List[Dict[str,
 
             out.append({"text": txt, "url": url2, "platform": "mastodon"})
 
-        time.sleep(0.2)
+        return out
 
-    return _dedup(out)
+    return _dedup(_fan_out(one, queries))
 
 
 def collect_x(queries: List[str], limit_per_query: int) -> List[Dict[str, str]]:
@@ -176,10 +187,10 @@ def collect_x(queries: List[str], limit_per_query: int) -> List[Dict[str, str]]:
     session = requests.Session()
     session.headers.update({"User-Agent": UA, "Authorization": f"Bearer {bearer}"})
 
-    out: List[Dict[str, str]] = []
     api = "https://api.x.com/2/tweets/search/recent"
 
-    for q in queries:
+    def one(q: str) -> List[Dict[str, str]]:
+        out: List[Dict[str, str]] = []
         params = {
             "query": q,
             "max_results": str(min(limit_per_query, 100)),
@@ -190,7 +201,7 @@ def collect_x(queries: List[str], limit_per_query: int) -> List[Dict[str, str]]:
             r.raise_for_status()
             data = r.json()
         except Exception:
-            continue
+            return []
 
         for t in (data.get("data") or []):
             tid = t.get("id")
@@ -199,9 +210,9 @@ def collect_x(queries: List[str], limit_per_query: int) -> List[Dict[str, str]]:
                 continue
             out.append({"text": text, "url": f"https://x.com/i/web/status/{tid}", "platform": "x"})
 
-        time.sleep(0.2)
+        return out
 
-    return _dedup(out)
+    return _dedup(_fan_out(one, queries))
 
 
 def collect_items(days_back: int = 365, total_limit: int = 60, per_query: int = 15) -> List[Dict[str, str]]:
@@ -221,15 +232,23 @@ def collect_items(days_back: int = 365, total_limit: int = 60, per_query: int =
     qenv = (os.getenv("COLLECT_QUERIES") or "").strip()
     queries = [x.strip() for x in qenv.split(",") if x.strip()] if qenv else DEFAULT_QUERIES
 
-    items: List[Dict[str, str]] = []
+    jobs = []
     if "hn" in srcs:
-        items += collect_hn(queries, days_back=days_back, limit_per_query=per_query)
+        jobs.append((collect_hn, {"days_back": days_back}))
     if "bluesky" in srcs:
-        items += collect_bluesky(queries, limit_per_query=per_query)
+        jobs.append((collect_bluesky, {}))
     if "mastodon" in srcs:
-        items += collect_mastodon(queries, limit_per_query=per_query)
+        jobs.append((collect_mastodon, {}))
     if "x" in srcs:
-        items += collect_x(queries, limit_per_query=per_query)
+        jobs.append((collect_x, {}))
+
+    # プラットフォーム同士も並列に集め、連結順は直列版と同じにする
+    items: List[Dict[str, str]] = []
+    if jobs:
+        with ThreadPoolExecutor(max_workers=len(jobs)) as ex:
+            futs = [ex.submit(fn, queries, limit_per_query=per_query, **kw) for fn, kw in jobs]
+            for fut in futs:
+                items += fut.result()
 
     items = _dedup(items)
     return items[:total_limit]
@@ -23,7 +23,10 @@ from __future__ import annotations
 import base64
 import datetime as dt
 import hashlib
+import heapq
 import html
+import io
+import itertools
 import json
 import logging
 import os
@@ -31,12 +34,21 @@ import random
 import re
 import sys
 import time
-from dataclasses import dataclass
-from typing import Any, Dict, Iterable, List, Optional, Tuple
+from collections import Counter, defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
 from urllib.error import HTTPError, URLError
 from urllib.parse import quote, urlencode, urlparse
 from urllib.request import Request, urlopen
 
+# optional: orjson (C) for read_json/write_json and request bodies; stdlib json is the fallback
+try:
+    import orjson  # type: ignore
+except Exception:
+    orjson = None
+
 
 # =============================================================================
 # Config (ENV)
@@ -113,6 +125,7 @@ RANDOM_SEED = os.environ.get("RANDOM_SEED", RUN_ID)
 MAX_THEMES = int(os.environ.get("MAX_THEMES", "6"))           # how many sites to build per run
 MAX_COLLECT = int(os.environ.get("MAX_COLLECT", "260"))       # total target; spec 173+; overshoot allowed
 MAX_AUTOFIX = int(os.environ.get("MAX_AUTOFIX", "5"))
+FETCH_CONCURRENCY = max(1, int(os.environ.get("FETCH_CONCURRENCY", "4")))  # parallel search requests per source
 
 ALLOW_ROOT_UPDATE = os.environ.get("ALLOW_ROOT_UPDATE", "0") == "1"
 PING_SITEMAP = os.environ.get("PING_SITEMAP", "0") == "1"
@@ -212,6 +225,7 @@ CATEGORIES_22 = [
     "Shopping/Products",
     "Events/Leisure",
 ]
+CATEGORY_SET = frozenset(CATEGORIES_22)
 
 random.seed(int(hashlib.sha256(RANDOM_SEED.encode("utf-8")).hexdigest()[:8], 16))
 
@@ -255,16 +269,56 @@ def write_text(path: str, content: str) -> None:
 
 
 def read_json(path: str, default: Any = None) -> Any:
-    if not os.path.exists(path):
+    # exists() + open() の 2 回ではなく open() 1 回で存在確認を兼ねる
+    try:
+        with open(path, "rb") as f:
+            raw = f.read()
+    except FileNotFoundError:
         return default
-    with open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
+    if orjson is not None:
+        try:
+            return orjson.loads(raw)
+        except orjson.JSONDecodeError:
+            pass  # stdlib は NaN 等も受け付けるので最終判断はそちらに任せる
+    return json.loads(raw.decode("utf-8"))
+
+
+# path -> ((mtime_ns, size), data): skip re-parsing files that have not changed on disk.
+# Callers must treat the returned object as read-only.
+_json_cache: Dict[str, Tuple[Tuple[int, int], Any]] = {}
+
+def read_json_cached(path: str, default: Any = None) -> Any:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return default
+    sig = (st.st_mtime_ns, st.st_size)
+    hit = _json_cache.get(path)
+    if hit is not None and hit[0] == sig:
+        return hit[1]
+    data = read_json(path, default=default)
+    _json_cache[path] = (sig, data)
+    return data
+
+
+def json_dumps_indent_bytes(obj: Any) -> bytes:
+    if orjson is not None:
+        # OPT_INDENT_2 の出力は json.dump(ensure_ascii=False, indent=2) と同じ整形（差は巨大 float の指数表記程度）
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            pass  # 64bit 超の int など orjson 非対応 → stdlib
+    return json.dumps(obj, ensure_ascii=False, indent=2).encode("utf-8")
 
 
 def write_json(path: str, obj: Any) -> None:
+    # 先に全部エンコードしてから tmp に書き、os.replace で差し替える（途中で落ちても元ファイルは壊れない）
+    data = json_dumps_indent_bytes(obj)
     os.makedirs(os.path.dirname(path), exist_ok=True)
-    with open(path, "w", encoding="utf-8", newline="\n") as f:
-        json.dump(obj, f, ensure_ascii=False, indent=2)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
 
 
 def now_iso() -> str:
@@ -275,11 +329,19 @@ def sha1(s: str) -> str:
     return hashlib.sha1(s.encode("utf-8")).hexdigest()
 
 
+def post_id(s: str) -> str:
+    # Post.id は実行内の識別子（永続化しない）なので非暗号ハッシュで短く
+    return hashlib.blake2b(s.encode("utf-8"), digest_size=8).hexdigest()
+
+
+SLUG_SCHEME_RE = re.compile(r"https?://")
+SLUG_NONALNUM_RE = re.compile(r"[^a-z0-9]+")  # '-' 自体も対象なので、連続ダッシュはここで1本になる
+HTML_TAG_RE = re.compile(r"<[^>]+>")
+
 def safe_slug(s: str, maxlen: int = 64) -> str:
     s = (s or "").strip().lower()
-    s = re.sub(r"https?://", "", s)
-    s = re.sub(r"[^a-z0-9]+", "-", s)
-    s = re.sub(r"-{2,}", "-", s).strip("-")
+    s = SLUG_SCHEME_RE.sub("", s)
+    s = SLUG_NONALNUM_RE.sub("-", s).strip("-")
     if not s:
         s = "tool"
     return (s[:maxlen].strip("-") or "tool")
@@ -290,13 +352,7 @@ def clamp(n: int, lo: int, hi: int) -> int:
 
 
 def uniq_keep_order(items: List[str]) -> List[str]:
-    seen = set()
-    out: List[str] = []
-    for x in items:
-        if x not in seen:
-            out.append(x)
-            seen.add(x)
-    return out
+    return list(dict.fromkeys(items))
 
 
 def is_frozen_path(path: str) -> bool:
@@ -332,6 +388,26 @@ def http_get(url: str, headers: Optional[Dict[str, str]] = None, timeout: int =
         return 0, str(e)
 
 
+def json_dumps_bytes(obj: Any) -> bytes:
+    # compact UTF-8 JSON for request bodies
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False).encode("utf-8")
+
+
+def fetch_ordered(fetch: Any, args: List[Any], stop: Optional[Callable[[], bool]] = None) -> Iterable[Any]:
+    """
+    FETCH_CONCURRENCY 件ずつ並列に fetch(arg) を投げ、結果は args の順に返す（出力順は直列と同じ）。
+    Lazy per batch: `stop()` is checked before each batch is sent, so once the caller's cap is
+    reached no further requests go out (pulling the next result would otherwise start a new batch).
+    """
+    with ThreadPoolExecutor(max_workers=FETCH_CONCURRENCY) as ex:
+        for i in range(0, len(args), FETCH_CONCURRENCY):
+            if stop is not None and stop():
+                return
+            yield from ex.map(fetch, args[i:i + FETCH_CONCURRENCY])
+
+
 def http_post_json(
     url: str,
     payload: Dict[str, Any],
@@ -341,7 +417,7 @@ def http_post_json(
     h = {"Content-Type": "application/json"}
     if headers:
         h.update(headers)
-    data = json.dumps(payload).encode("utf-8")
+    data = json_dumps_bytes(payload)
     req = Request(url, headers=h, data=data, method="POST")
     try:
         with urlopen(req, timeout=timeout) as resp:
@@ -388,31 +464,41 @@ BAN_WORDS_JA = [
     "自殺", "自傷",
 ]
 
+# EN/JA の禁止語を1本の正規表現にまとめる（lower() のコピーも不要、1回の走査で判定）
+BAN_RE = re.compile("|".join(re.escape(w) for w in BAN_WORDS + BAN_WORDS_JA), re.IGNORECASE)
+
 def adult_or_sensitive(text: str) -> bool:
-    t = (text or "").lower()
-    if any(w in t for w in BAN_WORDS):
-        return True
-    if any(w in (text or "") for w in BAN_WORDS_JA):
-        return True
-    return False
+    return BAN_RE.search(text or "") is not None
+
+
+VENT_QUESTION_MARKERS = ("?", "how", "what", "which", "where", "when", "why", "help", "fix", "recommend", "best", "compare", "plan", "checklist")
+VENT_EMOTION_WORDS = ("hate", "tired", "annoying", "frustrated", "sad", "depressed", "angry", "worst", "sucks")
 
 
-def too_broad_vent(text: str) -> bool:
+def too_broad_vent(text: str, low: Optional[str] = None) -> bool:
     """
     Downrank content that is mainly venting with no actionable question.
+    `low`: 呼び出し側で小文字化済みならそれを渡す（全文の .lower() を省く）
     """
-    t = (text or "").lower()
+    t = low if low is not None else (text or "").lower()
     # if there is no question-like marker and mostly abstract emotion words
-    has_question = any(x in t for x in ["?", "how", "what", "which", "where", "when", "why", "help", "fix", "recommend", "best", "compare", "plan", "checklist"])
-    emo = sum(1 for x in ["hate", "tired", "annoying", "frustrated", "sad", "depressed", "angry", "worst", "sucks"] if x in t)
-    if (not has_question) and emo >= 2:
-        return True
+    if any(x in t for x in VENT_QUESTION_MARKERS):
+        return False
+    # 感情語は 2 個見つかった時点で確定（残りは数えない）
+    emo = 0
+    for x in VENT_EMOTION_WORDS:
+        if x in t:
+            emo += 1
+            if emo >= 2:
+                return True
     return False
 
 
 # =============================================================================
 # Data models
 # =============================================================================
+WS_RE = re.compile(r"\s+")
+
 @dataclass
 class Post:
     source: str
@@ -423,11 +509,17 @@ class Post:
     created_at: str
     lang_hint: str = ""
     meta: Optional[Dict[str, Any]] = None
+    # (text, normalized) memo: norm_text() is called from clustering, keywords, category, scoring...
+    _norm: Optional[Tuple[str, str]] = field(default=None, init=False, repr=False, compare=False)
 
     def norm_text(self) -> str:
         t = self.text or ""
-        t = re.sub(r"\s+", " ", t).strip()
-        return t
+        memo = self._norm
+        if memo is not None and memo[0] is t:
+            return memo[1]
+        n = WS_RE.sub(" ", t).strip()
+        self._norm = (t, n)
+        return n
 
 
 @dataclass
@@ -458,6 +550,18 @@ KEYWORDS = [
     "resume", "interview", "anxiety", "compare", "recommend", "best",
     "move", "declutter", "cleaning", "laundry",
 ]
+# 小文字化済みテキストに対して 1 回の search で済ませる（any(k in low ...) の置き換え）
+KEYWORDS_RE = re.compile("|".join(re.escape(k.lower()) for k in KEYWORDS))
+
+# at://<did or handle>/app.bsky.feed.post/<rkey>
+BSKY_POST_URI_RE = re.compile(r"^at://(?P<did>[^/]+)/app\.bsky\.feed\.post/(?P<rkey>[^/]+)$")
+
+
+def bsky_post_url(uri: str, handle: str) -> str:
+    m = BSKY_POST_URI_RE.match(uri)
+    rkey = m.group("rkey") if m else uri.rsplit("/", 1)[-1]
+    return f"https://bsky.app/profile/{handle}/post/{rkey}"
+
 
 def collect_bluesky(max_items: int = 60) -> List[Post]:
     """
@@ -511,12 +615,14 @@ def collect_bluesky(max_items: int = 60) -> List[Post]:
         "weekend plan ideas",
     ]
 
+    def search(q: str) -> Tuple[int, str]:
+        url = "https://bsky.social/xrpc/app.bsky.feed.searchPosts?" + urlencode({"q": q, "limit": 25})
+        return http_get(url, headers=headers, timeout=20)
+
     out: List[Post] = []
-    for q in queries:
+    for q, (st, body) in zip(queries, fetch_ordered(search, queries, stop=lambda: len(out) >= max_items)):
         if len(out) >= max_items:
             break
-        url = "https://bsky.social/xrpc/app.bsky.feed.searchPosts?" + urlencode({"q": q, "limit": 25})
-        st, body = http_get(url, headers=headers, timeout=20)
         if st != 200:
             continue
         try:
@@ -537,18 +643,12 @@ def collect_bluesky(max_items: int = 60) -> List[Post]:
             if not text or adult_or_sensitive(text):
                 continue
 
-            post_url = ""
-            if uri:
-                try:
-                    rkey = uri.split("/")[-1]
-                    post_url = f"https://bsky.app/profile/{author}/post/{rkey}"
-                except Exception:
-                    post_url = uri
+            post_url = bsky_post_url(uri, author) if uri else ""
 
             if not post_url:
                 continue
 
-            pid = sha1(f"bsky:{uri}:{cid}:{post_url}")
+            pid = post_id(f"bsky:{uri}:{cid}:{post_url}")
             out.append(Post(
                 source="bluesky",
                 id=pid,
@@ -605,13 +705,13 @@ def collect_mastodon(max_items: int = 120) -> List[Post]:
             created_at = (s.get("created_at") or now_iso())
             acct = ((s.get("account") or {}).get("acct") or "unknown").strip()
             content = (s.get("content") or "")
-            text = re.sub(r"<[^>]+>", " ", content)
+            text = HTML_TAG_RE.sub(" ", content)
             text = html.unescape(text).strip()
 
             if not url or not text or adult_or_sensitive(text):
                 continue
 
-            pid = sha1(f"mstdn:{sid}:{url}")
+            pid = post_id(f"mstdn:{sid}:{url}")
             out.append(Post(
                 source="mastodon",
                 id=pid,
@@ -629,10 +729,16 @@ def collect_mastodon(max_items: int = 120) -> List[Post]:
         except Exception:
             pass
 
-    for tag in tags:
+    def tag_timeline(tag: str) -> Tuple[int, str]:
+        return http_get(f"{base}/api/v1/timelines/tag/{quote(tag)}?limit=30", headers=headers, timeout=20)
+
+    def search(q: str) -> Tuple[int, str]:
+        url = f"{base}/api/v2/search?" + urlencode({"q": q, "type": "statuses", "resolve": "true", "limit": "20"})
+        return http_get(url, headers=headers, timeout=20)
+
+    for tag, (st, body) in zip(tags, fetch_ordered(tag_timeline, tags, stop=lambda: len(out) >= max_items)):
         if len(out) >= max_items:
             break
-        st, body = http_get(f"{base}/api/v1/timelines/tag/{quote(tag)}?limit=30", headers=headers, timeout=20)
         if st != 200:
             continue
         try:
@@ -640,11 +746,9 @@ def collect_mastodon(max_items: int = 120) -> List[Post]:
         except Exception:
             continue
 
-    for q in queries:
+    for q, (st, body) in zip(queries, fetch_ordered(search, queries, stop=lambda: len(out) >= max_items)):
         if len(out) >= max_items:
             break
-        url = f"{base}/api/v2/search?" + urlencode({"q": q, "type": "statuses", "resolve": "true", "limit": "20"})
-        st, body = http_get(url, headers=headers, timeout=20)
         if st != 200:
             continue
         try:
@@ -701,7 +805,6 @@ def collect_reddit(max_items: int = 60) -> List[Post]:
         headers = {"User-Agent": REDDIT_USER_AGENT, "Accept": "application/json"}
         logging.info("Reddit: public mode collecting up to %d", max_items)
 
-    triggers = [k.lower() for k in KEYWORDS]
     out: List[Post] = []
 
     for sub in subs:
@@ -729,7 +832,7 @@ def collect_reddit(max_items: int = 60) -> List[Post]:
                 continue
 
             low = text.lower()
-            if not any(t in low for t in triggers):
+            if not KEYWORDS_RE.search(low):
                 continue
 
             permalink = (d.get("permalink") or "").strip()
@@ -742,7 +845,7 @@ def collect_reddit(max_items: int = 60) -> List[Post]:
             created_at = dt.datetime.fromtimestamp(float(created_utc), tz=dt.timezone.utc).astimezone().isoformat(timespec="seconds")
             rid = d.get("name") or d.get("id") or sha1(url)
 
-            pid = sha1(f"reddit:{rid}:{url}")
+            pid = post_id(f"reddit:{rid}:{url}")
             out.append(Post(
                 source="reddit",
                 id=pid,
@@ -784,7 +887,7 @@ def collect_hn(max_items: int = 70) -> List[Post]:
         if len(out) >= max_items:
             break
         text = (h.get("title") or "") + "\n" + (h.get("comment_text") or "")
-        text = re.sub(r"<[^>]+>", " ", text)
+        text = HTML_TAG_RE.sub(" ", text)
         text = html.unescape(text).strip()
         if not text or adult_or_sensitive(text):
             continue
@@ -797,7 +900,7 @@ def collect_hn(max_items: int = 70) -> List[Post]:
         if not hn_url:
             hn_url = f"https://news.ycombinator.com/item?id={object_id}"
 
-        pid = sha1(f"hn:{object_id}:{hn_url}")
+        pid = post_id(f"hn:{object_id}:{hn_url}")
         out.append(Post(
             source="hn",
             id=pid,
@@ -842,6 +945,10 @@ def collect_x_mentions(max_items: int = 1) -> List[Post]:
     if not X_BEARER_TOKEN:
         logging.info("X: skipped (missing X_BEARER_TOKEN or aliases)")
         return []
+    if max_items < 1:
+        # read 予算 0 のときは検索リクエスト自体を投げない
+        logging.info("X: skipped (read budget X_MAX=%d)", max_items)
+        return []
 
     max_items = 1  # 強制：1件だけ採用
     headers = {"Authorization": f"Bearer {X_BEARER_TOKEN}", "Accept": "application/json"}
@@ -897,7 +1004,7 @@ def collect_x_mentions(max_items: int = 1) -> List[Post]:
     created_at = picked.get("created_at") or now_iso()
     author = picked.get("author_id") or "unknown"
     post_url = f"https://x.com/i/web/status/{tid}"
-    pid = sha1(f"x:{tid}:{post_url}")
+    pid = post_id(f"x:{tid}:{post_url}")
 
     # save state (commit will persist)
     state["x_seen"] = (state.get("x_seen") or []) + [tid]
@@ -929,36 +1036,36 @@ this that these those it its i'm youre you're we they them our your my mine me y
 """.split())
 
 STOPWORDS_JA = set(["これ", "それ", "あれ", "ため", "ので", "から", "です", "ます", "いる", "ある", "なる", "こと", "もの", "よう", "へ", "に", "を", "が", "と", "で", "も"])
+# simple_tokenize 用: EN/JA を 1 回の membership テストで済ませる
+STOPWORDS = frozenset(STOPWORDS_EN | STOPWORDS_JA)
 
-def simple_tokenize(text: str) -> List[str]:
-    t = (text or "").lower()
-    t = re.sub(r"https?://\S+", " ", t)
-    t = re.sub(r"[\[\]()<>{}※*\"'`~^|\\]", " ", t)
-    t = re.sub(r"[^0-9a-z\u3040-\u30ff\u4e00-\u9fff\s\-_/.:]", " ", t)
-    t = re.sub(r"\s+", " ", t).strip()
+# simple_tokenize は全投稿に対して何度も呼ばれるので、パターンは一度だけコンパイルする
+# URL と許可外の文字（記号類を含む）を 1 パスで空白に置換する
+TOKEN_STRIP_RE = re.compile(r"https?://\S+|[^0-9a-z\u3040-\u30ff\u4e00-\u9fff\s\-_/.:]+")
+JP_CHUNK_RE = re.compile(r"[\u3040-\u30ff\u4e00-\u9fff]{2,}")
 
-    parts: List[str] = []
-    for p in t.split():
-        if len(p) <= 1:
-            continue
-        if p in STOPWORDS_EN:
-            continue
-        if p in STOPWORDS_JA:
-            continue
-        parts.append(p)
+# 同じ投稿本文を clustering と extract_keywords で 2 回トークナイズするのでキャッシュする
+# （結果は共有されるので tuple で返す）
+@lru_cache(maxsize=4096)
+def simple_tokenize(text: str) -> Tuple[str, ...]:
+    # 空白の正規化は不要（split() と JP_CHUNK_RE はどちらも空白の種類・連続に依存しない）
+    t = TOKEN_STRIP_RE.sub(" ", (text or "").lower())
+
+    stop = STOPWORDS
+    parts = [p for p in t.split() if len(p) > 1 and p not in stop]
 
-    # crude JP chunks to help clustering without full tokenizer
-    jp_chunks = re.findall(r"[\u3040-\u30ff\u4e00-\u9fff]{2,}", t)
-    parts.extend([c for c in jp_chunks if c not in STOPWORDS_JA and len(c) >= 2])
+    # crude JP chunks to help clustering without full tokenizer (JP_CHUNK_RE は 2 文字以上のみ)
+    parts.extend([c for c in JP_CHUNK_RE.findall(t) if c not in STOPWORDS_JA])
 
-    return parts[:100]
+    return tuple(parts[:100])
 
 
 def jaccard(a: set, b: set) -> float:
     if not a or not b:
         return 0.0
+    # |a ∪ b| = |a| + |b| - |a ∩ b|: no second set is built for the union
     inter = len(a & b)
-    union = len(a | b)
+    union = len(a) + len(b) - inter
     return inter / union if union else 0.0
 
 
@@ -969,6 +1076,13 @@ def cluster_posts(posts: List[Post], threshold: float = 0.22) -> List[List[Post]
     logging.info("Clustering %d posts (threshold=%.2f)", len(posts), threshold)
     token_sets: Dict[str, set] = {p.id: set(simple_tokenize(p.norm_text())) for p in posts}
 
+    # inverted index token -> post positions: with threshold > 0 a match needs at least one
+    # shared token, so only posts sharing a token with `base` are compared
+    index: Dict[str, List[int]] = defaultdict(list)
+    for j, p in enumerate(posts):
+        for t in token_sets[p.id]:
+            index[t].append(j)
+
     clusters: List[List[Post]] = []
     used = set()
 
@@ -978,10 +1092,20 @@ def cluster_posts(posts: List[Post], threshold: float = 0.22) -> List[List[Post]
         used.add(p.id)
         base = token_sets[p.id]
         c = [p]
-        for q in posts[i + 1:]:
+        if threshold > 0:
+            others: Iterable[Post] = [posts[j] for j in sorted({j for t in base for j in index[t] if j > i})]
+        else:
+            others = posts[i + 1:]
+        lb = len(base)
+        for q in others:
             if q.id in used:
                 continue
-            sim = jaccard(base, token_sets[q.id])
+            other = token_sets[q.id]
+            # Jaccard <= min(|a|,|b|) / max(|a|,|b|): skip pairs whose sizes alone rule out a match
+            lq = len(other)
+            if lb and lq and (lb / lq if lb < lq else lq / lb) < threshold:
+                continue
+            sim = jaccard(base, other)
             if sim >= threshold:
                 used.add(q.id)
                 c.append(q)
@@ -993,122 +1117,151 @@ def cluster_posts(posts: List[Post], threshold: float = 0.22) -> List[List[Post]
 
 
 def extract_keywords(posts: List[Post], topk: int = 14) -> List[str]:
-    freq: Dict[str, int] = {}
+    freq: Counter = Counter()
     for p in posts:
-        for w in simple_tokenize(p.norm_text()):
-            freq[w] = freq.get(w, 0) + 1
-    items = sorted(freq.items(), key=lambda kv: (-kv[1], kv[0]))
-    return [k for k, _ in items[:topk]]
+        freq.update(simple_tokenize(p.norm_text()))
+    # 必要なのは上位 topk だけなので全件ソートはしない（順序は (-count, word) で従来と同じ）
+    items = heapq.nsmallest(topk, freq.items(), key=lambda kv: (-kv[1], kv[0]))
+    return [k for k, _ in items]
 
 
-def choose_category(posts: List[Post], keywords: List[str]) -> str:
-    """
-    Heuristic category selection across fixed 22 categories.
-    """
-    text = " ".join([p.norm_text() for p in posts]).lower()
-    k = set([x.lower() for x in keywords])
+# (category, keywords): first rule with any keyword in the cluster text / keywords wins
+CATEGORY_RULES: Tuple[Tuple[str, Tuple[str, ...]], ...] = (
+    # tech
+    ("Web/Hosting", ("dns", "cname", "aaaa", "a record", "nameserver", "github pages", "hosting", "ssl", "https")),
+    ("Dev/Tools", ("python", "node", "npm", "pip", "powershell", "bash", "cli", "library", "compile", "stack", "trace", "dev")),
+    ("AI/Automation", ("automation", "workflow", "cron", "github actions", "llm", "openai", "prompt", "agent")),
+    ("Security/Privacy", ("privacy", "security", "2fa", "phishing", "cookie", "vpn", "encryption", "leak")),
+    ("Media", ("video", "mp4", "compress", "codec", "ffmpeg", "audio", "subtitle")),
+    ("PDF/Docs", ("pdf", "docx", "ppt", "docs", "word", "convert", "merge", "compress pdf")),
+    ("Images/Design", ("image", "png", "jpg", "webp", "design", "figma", "photoshop", "illustrator")),
+    ("Data/Spreadsheets", ("excel", "spreadsheet", "csv", "google sheets", "vlookup", "pivot", "formula")),
+    ("Business/Accounting/Tax", ("invoice", "tax", "accounting", "bookkeeping", "receipt", "vat")),
+    ("Marketing/Social", ("seo", "marketing", "ads", "social", "instagram", "tiktok", "youtube", "growth")),
+    ("Productivity", ("productivity", "todo", "note", "calendar", "time management", "procrastination", "focus")),
+    ("Education/Language", ("english", "language", "toeic", "eiken", "ielts")),
+    # life
+    ("Travel/Planning", ("travel", "trip", "hotel", "itinerary", "flight", "booking", "layover", "packing", "esim")),
+    ("Food/Cooking", ("recipe", "cook", "cooking", "meal prep", "kitchen", "grocery")),
+    ("Health/Fitness", ("workout", "fitness", "diet", "health", "running", "sleep", "calories", "protein")),
+    ("Study/Learning", ("study", "learning", "exam", "homework", "memorize", "flashcards")),
+    ("Money/Personal Finance", ("money", "budget", "loan", "invest", "stock", "fees", "refund")),
+    ("Career/Work", ("career", "job", "resume", "cv", "interview", "apply")),
+    ("Relationships/Communication", ("relationship", "communication", "friend", "chat", "texting", "awkward")),
+    ("Home/Life Admin", ("home", "rent", "utility", "life admin", "paperwork", "moving", "declutter", "cleaning")),
+    ("Shopping/Products", ("buy", "shopping", "product", "recommend", "compare", "best", "value")),
+    ("Events/Leisure", ("event", "ticket", "concert", "sports", "weekend plan", "date plan", "rainy day")),
+)
 
-    def has_any(words: List[str]) -> bool:
-        return any(w in text for w in words) or any(w in k for w in words)
 
-    # tech
-    if has_any(["dns", "cname", "aaaa", "a record", "nameserver", "github pages", "hosting", "ssl", "https"]):
-        return "Web/Hosting"
-    if has_any(["python", "node", "npm", "pip", "powershell", "bash", "cli", "library", "compile", "stack", "trace", "dev"]):
-        return "Dev/Tools"
-    if has_any(["automation", "workflow", "cron", "github actions", "llm", "openai", "prompt", "agent"]):
-        return "AI/Automation"
-    if has_any(["privacy", "security", "2fa", "phishing", "cookie", "vpn", "encryption", "leak"]):
-        return "Security/Privacy"
-    if has_any(["video", "mp4", "compress", "codec", "ffmpeg", "audio", "subtitle"]):
-        return "Media"
-    if has_any(["pdf", "docx", "ppt", "docs", "word", "convert", "merge", "compress pdf"]):
-        return "PDF/Docs"
-    if has_any(["image", "png", "jpg", "webp", "design", "figma", "photoshop", "illustrator"]):
-        return "Images/Design"
-    if has_any(["excel", "spreadsheet", "csv", "google sheets", "vlookup", "pivot", "formula"]):
-        return "Data/Spreadsheets"
-    if has_any(["invoice", "tax", "accounting", "bookkeeping", "receipt", "vat"]):
-        return "Business/Accounting/Tax"
-    if has_any(["seo", "marketing", "ads", "social", "instagram", "tiktok", "youtube", "growth"]):
-        return "Marketing/Social"
-    if has_any(["productivity", "todo", "note", "calendar", "time management", "procrastination", "focus"]):
-        return "Productivity"
-    if has_any(["english", "language", "toeic", "eiken", "ielts"]):
-        return "Education/Language"
+# per rule: one compiled alternation (single scan of the text) + a frozenset for exact keyword hits
+CATEGORY_MATCHERS: Tuple[Tuple[str, "re.Pattern[str]", frozenset], ...] = tuple(
+    (category, re.compile("|".join(re.escape(w) for w in words)), frozenset(words))
+    for category, words in CATEGORY_RULES
+)
 
-    # life
-    if has_any(["travel", "trip", "hotel", "itinerary", "flight", "booking", "layover", "packing", "esim"]):
-        return "Travel/Planning"
-    if has_any(["recipe", "cook", "cooking", "meal prep", "kitchen", "grocery"]):
-        return "Food/Cooking"
-    if has_any(["workout", "fitness", "diet", "health", "running", "sleep", "calories", "protein"]):
-        return "Health/Fitness"
-    if has_any(["study", "learning", "exam", "homework", "memorize", "flashcards"]):
-        return "Study/Learning"
-    if has_any(["money", "budget", "loan", "invest", "stock", "fees", "refund"]):
-        return "Money/Personal Finance"
-    if has_any(["career", "job", "resume", "cv", "interview", "apply"]):
-        return "Career/Work"
-    if has_any(["relationship", "communication", "friend", "chat", "texting", "awkward"]):
-        return "Relationships/Communication"
-    if has_any(["home", "rent", "utility", "life admin", "paperwork", "moving", "declutter", "cleaning"]):
-        return "Home/Life Admin"
-    if has_any(["buy", "shopping", "product", "recommend", "compare", "best", "value"]):
-        return "Shopping/Products"
-    if has_any(["event", "ticket", "concert", "sports", "weekend plan", "date plan", "rainy day"]):
-        return "Events/Leisure"
 
-    return "Dev/Tools"
+def cluster_text(posts: List[Post]) -> str:
+    # choose_category / score_cluster 共通の検索対象（クラスタ全文の小文字）
+    return " ".join([p.norm_text() for p in posts]).lower()
 
 
-def score_cluster(posts: List[Post], category: str) -> float:
+def choose_category(posts: List[Post], keywords: List[str], text: Optional[str] = None) -> str:
     """
-    Score: cluster size + solvable tool signal + life “decision urgency” signals.
+    Heuristic category selection across fixed 22 categories.
     """
-    size = len(posts)
-    text = " ".join([p.norm_text() for p in posts]).lower()
+    if text is None:
+        text = cluster_text(posts)
+    k = set([x.lower() for x in keywords])
 
-    solvable_signals = [
+    for category, words_re, words_set in CATEGORY_MATCHERS:
+        if words_re.search(text) or not words_set.isdisjoint(k):
+            return category
+
+    return "Dev/Tools"
+
+
+# (keywords, weight): each distinct keyword found in the cluster text adds `weight`
+CLUSTER_SIGNALS: Tuple[Tuple[Tuple[str, ...], float], ...] = (
+    # solvable
+    ((
         "how", "fix", "error", "failed", "can't", "cannot", "help",
         "設定", "直し", "原因", "エラー", "できない", "不具合", "失敗",
-    ]
-    tool_signals = [
+    ), 0.5),
+    # tool
+    ((
         "convert", "compress", "calculator", "generator", "planner", "template", "checklist", "step-by-step", "schedule",
         "変換", "圧縮", "計算", "チェック", "テンプレ", "ツール", "手順",
-    ]
-    life_decision = [
+    ), 0.7),
+    # life decision
+    ((
         "plan", "itinerary", "packing", "what should i do", "recommend", "best", "compare", "budget", "schedule",
         "checklist", "template", "step by step", "meal prep", "study plan",
-    ]
-    urgency = [
+    ), 0.55),
+    # urgency
+    ((
         "urgent", "today", "tomorrow", "this week", "before i go", "deadline", "soon", "asap",
         "今日", "明日", "今週", "出発前", "締切",
-    ]
-    stuck = [
+    ), 0.45),
+    # stuck
+    ((
         "i'm stuck", "confused", "overwhelmed", "don't know what to choose", "not sure", "anxiety",
         "詰んだ", "わからない", "迷う", "不安",
-    ]
+    ), 0.35),
+)
+
+LIFE_CATEGORIES = frozenset([
+    "Travel/Planning", "Food/Cooking", "Health/Fitness", "Study/Learning", "Money/Personal Finance",
+    "Career/Work", "Relationships/Communication", "Home/Life Admin", "Shopping/Products", "Events/Leisure",
+])
+
 
-    s1 = sum(1 for w in solvable_signals if w in text)
-    s2 = sum(1 for w in tool_signals if w in text)
-    s3 = sum(1 for w in life_decision if w in text)
-    s4 = sum(1 for w in urgency if w in text)
-    s5 = sum(1 for w in stuck if w in text)
+def score_cluster(posts: List[Post], category: str, text: Optional[str] = None) -> float:
+    """
+    Score: cluster size + solvable tool signal + life “decision urgency” signals.
+    """
+    size = len(posts)
+    if text is None:
+        text = cluster_text(posts)
 
-    score = size * 1.8 + s1 * 0.5 + s2 * 0.7 + s3 * 0.55 + s4 * 0.45 + s5 * 0.35
+    score = size * 1.8
+    for words, weight in CLUSTER_SIGNALS:
+        score += sum(1 for w in words if w in text) * weight
 
-    if too_broad_vent(text):
+    if too_broad_vent(text, low=text):  # cluster_text() は小文字化済み
         score *= 0.75
 
     # mild balancing so life categories can compete
-    if category in ["Travel/Planning", "Food/Cooking", "Health/Fitness", "Study/Learning", "Money/Personal Finance",
-                    "Career/Work", "Relationships/Communication", "Home/Life Admin", "Shopping/Products", "Events/Leisure"]:
+    if category in LIFE_CATEGORIES:
         score *= 1.12
 
     return float(score)
 
 
+# category -> search-title suffix (build_search_title); unknown categories get the generic suffix
+SEARCH_TITLE_SUFFIX: Dict[str, str] = {
+    "Travel/Planning": "itinerary planner checklist",
+    "Food/Cooking": "meal prep plan + shopping list",
+    "Health/Fitness": "workout plan + habit tracker",
+    "Study/Learning": "study plan schedule template",
+    "Money/Personal Finance": "budget planner + fee checklist",
+    "Career/Work": "resume checklist + interview prep",
+    "Relationships/Communication": "conversation templates + awkwardness fixes",
+    "Home/Life Admin": "moving checklist + life admin planner",
+    "Shopping/Products": "compare tool + buying checklist",
+    "Events/Leisure": "weekend plan generator + checklist",
+    # tech
+    "Web/Hosting": "DNS/SSL fix checklist",
+    "PDF/Docs": "PDF convert/merge checklist",
+    "Media": "video compression settings checklist",
+    "Data/Spreadsheets": "spreadsheet formula fix checklist",
+    "Security/Privacy": "privacy settings + login fix checklist",
+    "AI/Automation": "automation workflow fix checklist",
+    "Marketing/Social": "social growth checklist + template",
+    "Education/Language": "language study plan template",
+}
+
+
 def build_search_title(category: str, keywords: List[str]) -> str:
     """
     Force titles toward “search query” style (EN) + includes tool-ish noun.
@@ -1118,50 +1271,19 @@ def build_search_title(category: str, keywords: List[str]) -> str:
     if not base:
         base = category.replace("/", " ")
 
-    if category == "Travel/Planning":
-        return f"{base} itinerary planner checklist"
-    if category == "Food/Cooking":
-        return f"{base} meal prep plan + shopping list"
-    if category == "Health/Fitness":
-        return f"{base} workout plan + habit tracker"
-    if category == "Study/Learning":
-        return f"{base} study plan schedule template"
-    if category == "Money/Personal Finance":
-        return f"{base} budget planner + fee checklist"
-    if category == "Career/Work":
-        return f"{base} resume checklist + interview prep"
-    if category == "Relationships/Communication":
-        return f"{base} conversation templates + awkwardness fixes"
-    if category == "Home/Life Admin":
-        return f"{base} moving checklist + life admin planner"
-    if category == "Shopping/Products":
-        return f"{base} compare tool + buying checklist"
-    if category == "Events/Leisure":
-        return f"{base} weekend plan generator + checklist"
-    # tech
-    if category == "Web/Hosting":
-        return f"{base} DNS/SSL fix checklist"
-    if category == "PDF/Docs":
-        return f"{base} PDF convert/merge checklist"
-    if category == "Media":
-        return f"{base} video compression settings checklist"
-    if category == "Data/Spreadsheets":
-        return f"{base} spreadsheet formula fix checklist"
-    if category == "Security/Privacy":
-        return f"{base} privacy settings + login fix checklist"
-    if category == "AI/Automation":
-        return f"{base} automation workflow fix checklist"
-    if category == "Marketing/Social":
-        return f"{base} social growth checklist + template"
-    if category == "Education/Language":
-        return f"{base} language study plan template"
-    return f"{base} fix guide checklist tool"
+    return f"{base} {SEARCH_TITLE_SUFFIX.get(category, 'fix guide checklist tool')}"
 
 
-def make_theme(posts: List[Post]) -> Theme:
+def theme_signals(posts: List[Post]) -> Tuple[float, List[str], str]:
+    # ランキングに必要な部分だけ (score, keywords, category)。Theme 本体の組み立ては make_theme
     keywords = extract_keywords(posts)
-    category = choose_category(posts, keywords)
-    score = score_cluster(posts, category)
+    text = cluster_text(posts)
+    category = choose_category(posts, keywords, text)
+    return score_cluster(posts, category, text), keywords, category
+
+
+def make_theme(posts: List[Post], signals: Optional[Tuple[float, List[str], str]] = None) -> Theme:
+    score, keywords, category = signals if signals is not None else theme_signals(posts)
 
     search_title = build_search_title(category, keywords)
     base_slug = safe_slug(search_title)
@@ -1173,7 +1295,7 @@ def make_theme(posts: List[Post]) -> Theme:
         line = p.norm_text()[:140].rstrip()
         if line:
             problems.append(line)
-    problems = uniq_keep_order([re.sub(r"\s+", " ", x) for x in problems])
+    problems = uniq_keep_order([WS_RE.sub(" ", x) for x in problems])
 
     while len(problems) < 10:
         problems.append(f"Trouble related to {category}: symptom #{len(problems)+1}")
@@ -1196,7 +1318,7 @@ def make_theme(posts: List[Post]) -> Theme:
 # Affiliates
 # =============================================================================
 def load_affiliates() -> Dict[str, Any]:
-    data = read_json(AFFILIATES_JSON, default={})
+    data = read_json_cached(AFFILIATES_JSON, default={})
     if not isinstance(data, dict):
         return {}
     return data
@@ -1225,13 +1347,16 @@ def normalize_affiliates_shape(aff: Dict[str, Any]) -> Dict[str, List[Dict[str,
     return out
 
 
+SCRIPT_TAG_RE = re.compile(r"(?is)<script[^>]*>.*?</script>")
+
+
 def sanitize_affiliate_html(h: str) -> str:
     """
     Script tags forbidden. Keep existing approach: strip <script ...>...</script>.
     """
     if not h:
         return ""
-    h2 = re.sub(r"(?is)<script[^>]*>.*?</script>", "", h)
+    h2 = SCRIPT_TAG_RE.sub("", h)
     return h2.strip()
 
 
@@ -1244,21 +1369,18 @@ def pick_affiliates_for_category(aff_norm: Dict[str, List[Dict[str, Any]]], cate
         except Exception:
             return 0.0
 
-    cleaned: List[Dict[str, Any]] = []
-    for x in items:
+    # ignore items without html/url; 並べ替えてから上位 topn だけ sanitize する（採否は sanitize 結果に依存しない）
+    eligible = [x for x in items if x.get("html") or x.get("url")]
+    eligible.sort(key=lambda x: -pr(x))
+
+    picked: List[Dict[str, Any]] = []
+    for x in eligible[:topn]:
         html_code = x.get("html", "") or ""
         if html_code:
-            x2 = dict(x)
-            x2["html"] = sanitize_affiliate_html(str(html_code))
-            cleaned.append(x2)
-        elif x.get("url"):
-            cleaned.append(x)
-        else:
-            # ignore items without html/url
-            pass
-
-    cleaned.sort(key=lambda x: -pr(x))
-    return cleaned[:topn]
+            x = dict(x)
+            x["html"] = sanitize_affiliate_html(str(html_code))
+        picked.append(x)
+    return picked
 
 
 def audit_affiliate_keys(aff_raw: Dict[str, Any]) -> Dict[str, Any]:
@@ -1276,7 +1398,7 @@ def audit_affiliate_keys(aff_raw: Dict[str, Any]) -> Dict[str, Any]:
     keys.discard("categories")
 
     missing = [c for c in CATEGORIES_22 if c not in keys]
-    extra = sorted([k for k in keys if k not in set(CATEGORIES_22)])
+    extra = sorted(keys - CATEGORY_SET)
 
     return {
         "missing": missing,
@@ -1285,6 +1407,21 @@ def audit_affiliate_keys(aff_raw: Dict[str, Any]) -> Dict[str, Any]:
     }
 
 
+# (raw dict, aff_norm, aff_audit) for the last affiliates.json object seen.
+# load_affiliates() returns the same cached object until the file changes, so import-time init and main() share one pass.
+_aff_derived: Optional[Tuple[Dict[str, Any], Dict[str, List[Dict[str, Any]]], Dict[str, Any]]] = None
+
+
+def derive_affiliates(aff_raw: Dict[str, Any]) -> Tuple[Dict[str, List[Dict[str, Any]]], Dict[str, Any]]:
+    global _aff_derived
+    if _aff_derived is not None and _aff_derived[0] is aff_raw:
+        return _aff_derived[1], _aff_derived[2]
+    audit = audit_affiliate_keys(aff_raw)
+    norm = normalize_affiliates_shape(aff_raw)
+    _aff_derived = (aff_raw, norm, audit)
+    return norm, audit
+
+
 # =============================================================================
 # Hub inventory (hub/sites.json) & routing features (categories / popular / new / purpose)
 # ---- Affiliates: always define aff_norm (and aff_audit) BEFORE any use ----
@@ -1296,9 +1433,7 @@ def init_affiliates() -> tuple[dict[str, list[dict[str, Any]]], dict[str, Any]]:
       - aff_audit: { missing: [...], extra: [...], ok: bool }
     """
     try:
-        _aff_raw = load_affiliates()
-        _audit = audit_affiliate_keys(_aff_raw)
-        _norm = normalize_affiliates_shape(_aff_raw)
+        _norm, _audit = derive_affiliates(load_affiliates())
         return _norm, _audit
     except Exception:
         # ultra-safe fallback (no affiliates)
@@ -1311,7 +1446,7 @@ aff_norm, aff_audit = init_affiliates()
 
 # =============================================================================
 def read_hub_sites() -> List[Dict[str, Any]]:
-    data = read_json(HUB_SITES_JSON, default={})
+    data = read_json_cached(HUB_SITES_JSON, default={})
     if isinstance(data, list):
         return [x for x in data if isinstance(x, dict)]
     if isinstance(data, dict) and isinstance(data.get("sites"), list):
@@ -1337,24 +1472,38 @@ def write_hub_sites(sites: List[Dict[str, Any]], aggregates: Dict[str, Any]) ->
     write_json(HUB_SITES_JSON, payload)
 
 
+# (bucket, keywords) for "By purpose" routes; keywords are already lowercase
+PURPOSE_KEYWORDS: Tuple[Tuple[str, Tuple[str, ...]], ...] = (
+    ("convert", ("convert", "変換", "pdf", "docx", "png", "mp4")),
+    ("time", ("time", "schedule", "calendar", "deadline", "study plan", "itinerary")),
+    ("productivity", ("template", "checklist", "planner", "workflow", "habit")),
+    ("pricing", ("budget", "fees", "cost", "price", "compare", "refund")),
+)
+
+
+def site_card(s: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "title": s.get("search_title") or s.get("title") or "Tool",
+        "url": s.get("url") or "#",
+        "slug": s.get("slug") or "",
+    }
+
+
 def compute_aggregates(all_sites: List[Dict[str, Any]]) -> Dict[str, Any]:
     """
     Provide hub-strengthening data via sites.json (categories list + popular/new/purpose routes).
     Even if hub frontend ignores it today, the data is ready and future-proof.
     """
     # categories
-    cats: Dict[str, List[Dict[str, Any]]] = {}
-    for cat in CATEGORIES_22:
-        cats[cat] = []
+    cats: Dict[str, List[Dict[str, Any]]] = {cat: [] for cat in CATEGORIES_22}
+
+    # one card dict per site, shared by every list below (read-only; serialized as-is)
+    cards = [site_card(s) for s in all_sites]
 
-    for s in all_sites:
+    for s, card in zip(all_sites, cards):
         cat = s.get("category") or ""
         if cat in cats:
-            cats[cat].append({
-                "title": s.get("search_title") or s.get("title") or "Tool",
-                "url": s.get("url") or "#",
-                "slug": s.get("slug") or "",
-            })
+            cats[cat].append(card)
 
     for cat in cats:
         # stable ordering: title
@@ -1368,21 +1517,24 @@ def compute_aggregates(all_sites: List[Dict[str, Any]]) -> Dict[str, Any]:
         except Exception:
             return 0.0
 
-    new_sites = sorted(all_sites, key=ts, reverse=True)[:12]
-    new_list = [{"title": s.get("search_title") or s.get("title") or "Tool", "url": s.get("url") or "#", "slug": s.get("slug") or ""} for s in new_sites]
+    # parse each timestamp once; both "new" and the "popular" fallback reuse it
+    stamps = [ts(s) for s in all_sites]
+    idx = range(len(all_sites))
+
+    new_list = [cards[i] for i in heapq.nlargest(12, idx, key=stamps.__getitem__)]
 
     # popular: prefer views/score/popularity if present; else fallback to recency
-    def pop_metric(s: Dict[str, Any]) -> float:
+    def pop_metric(i: int) -> float:
+        s = all_sites[i]
         for k in ["views", "score", "popularity"]:
             if k in s:
                 try:
                     return float(s.get(k, 0))
                 except Exception:
                     pass
-        return ts(s)
+        return stamps[i]
 
-    popular_sites = sorted(all_sites, key=pop_metric, reverse=True)[:12]
-    popular_list = [{"title": s.get("search_title") or s.get("title") or "Tool", "url": s.get("url") or "#", "slug": s.get("slug") or ""} for s in popular_sites]
+    popular_list = [cards[i] for i in heapq.nlargest(12, idx, key=pop_metric)]
 
     # purpose routes: simple buckets for internal navigation
     purpose_buckets = {
@@ -1391,23 +1543,12 @@ def compute_aggregates(all_sites: List[Dict[str, Any]]) -> Dict[str, Any]:
         "By purpose": [],  # filled below
     }
 
-    purpose_keywords = {
-        "convert": ["convert", "変換", "pdf", "docx", "png", "mp4"],
-        "time": ["time", "schedule", "calendar", "deadline", "study plan", "itinerary"],
-        "productivity": ["template", "checklist", "planner", "workflow", "habit"],
-        "pricing": ["budget", "fees", "cost", "price", "compare", "refund"],
-    }
-
-    by_purpose: Dict[str, List[Dict[str, Any]]] = {k: [] for k in purpose_keywords.keys()}
-    for s in all_sites:
+    by_purpose: Dict[str, List[Dict[str, Any]]] = {k: [] for k, _ in PURPOSE_KEYWORDS}
+    for s, card in zip(all_sites, cards):
         title = (s.get("search_title") or s.get("title") or "").lower()
-        for bucket, words in purpose_keywords.items():
-            if any(w.lower() in title for w in words):
-                by_purpose[bucket].append({
-                    "title": s.get("search_title") or s.get("title") or "Tool",
-                    "url": s.get("url") or "#",
-                    "slug": s.get("slug") or "",
-                })
+        for bucket, words in PURPOSE_KEYWORDS:
+            if any(w in title for w in words):
+                by_purpose[bucket].append(card)
 
     # keep small
     for bucket in by_purpose:
@@ -1589,9 +1730,12 @@ I18N = {
     },
 }
 
+# I18N / LANGS は定数なので、ページごとに dump し直さず 1 回だけ組み立てる
+@lru_cache(maxsize=None)
 def build_i18n_script(default_lang: str = "en") -> str:
-    i18n_json = json.dumps(I18N, ensure_ascii=False)
-    langs_json = json.dumps(LANGS)
+    # 埋め込み用なので区切りの空白は省く（ページが軽くなる）
+    i18n_json = json.dumps(I18N, ensure_ascii=False, separators=(",", ":"))
+    langs_json = json.dumps(LANGS, separators=(",", ":"))
     return f"""<script>
 const I18N = {i18n_json};
 const LANGS = {langs_json};
@@ -1740,105 +1884,93 @@ def build_causes(category: str) -> List[str]:
     ])
 
 
+# build_steps: 全カテゴリ共通の手順 + カテゴリ別の追加手順（if の連鎖ではなく dict 1 回の参照で引く）
+BASE_STEPS: Tuple[str, ...] = (
+    "再現条件を固定する（同じ入力・同じ手順・同じ端末/ブラウザで再現）",
+    "表示/ログをそのまま保存（コピペ/スクショ、時刻も残す）",
+    "影響範囲が小さい順に確認（確認→読み取り→最小変更→検証）",
+    "直ったら差分を記録し、再発防止チェックを作る（次回3分復旧が目標）",
+)
+
+INFRA_STEPS: Tuple[str, ...] = (
+    "上書き禁止を強制する（衝突は -2/-3、凍結パスは触らない）",
+    "ログ粒度を上げる（HTTPステータス/例外/レスポンス先頭）",
+)
+
+CATEGORY_STEPS: Dict[str, Tuple[str, ...]] = {
+    "Web/Hosting": INFRA_STEPS,
+    "AI/Automation": INFRA_STEPS,
+    "Travel/Planning": (
+        "日数・出発/帰宅時刻・絶対にやりたいこと（3つ）を先に固定",
+        "移動時間を先に置いて、残りに観光を入れる（詰め込み防止）",
+        "持ち物を「必須/現地調達/予備」に分けてチェックリスト化",
+        "予算を「宿/交通/食/観光/予備費」に割って上限を決める",
+    ),
+    "Food/Cooking": (
+        "主菜を先に決める（3〜5個）→副菜→主食の順で決める",
+        "買い物リストをカテゴリ別（肉/野菜/調味料…）に出す",
+        "作り置きは保存日数ベースで回す（先に消費順を決める）",
+        "調理は同時進行しやすい順に並べる（焼く/茹でる/切る）",
+    ),
+    "Health/Fitness": (
+        "まず睡眠を固定（就寝/起床の時刻を先に決める）",
+        "運動は最小単位から（例：腕立て5回/散歩10分）",
+        "週の回数→強度の順で上げる（いきなり強度は上げない）",
+        "記録は1項目だけ（体重/歩数/睡眠など）から開始",
+    ),
+    "Study/Learning": (
+        "目標を「今週の量」→「今日の量」に割る（最小単位を作る）",
+        "復習は翌日/3日後/7日後の固定枠で回す",
+        "教材は同時に2つまで（増やすほど迷う）",
+        "集中は環境で作る（通知OFF/場所固定/開始の儀式）",
+    ),
+    "Money/Personal Finance": (
+        "固定費/変動費/特別費に分けて、まず固定費から最適化",
+        "手数料/返金条件/解約条件を“先に”確認して事故を防ぐ",
+        "支払い日・引き落とし日をカレンダーに固定（ズレで詰まない）",
+        "比較軸（総額/利便性/リスク）を1枚にまとめて決め切る",
+    ),
+    "Career/Work": (
+        "実績は数字で書く（例：改善率/件数/期間/役割）",
+        "職務要約は3行で結論→根拠→再現性の順",
+        "応募先ごとに要点だけ差し替える（全部を書き換えない）",
+        "面接は想定質問を先に潰す（自己紹介/志望動機/強み/弱み）",
+    ),
+    "Relationships/Communication": (
+        "文を短くする（1文1要点、余計な前置きを削る）",
+        "お願い/断り/お礼の型を使う（毎回ゼロから考えない）",
+        "相手の温度感に合わせて情報量を調整する",
+        "返信が不安なら“選択肢”で返す（AかB、どっちがいい？形式）",
+    ),
+    "Home/Life Admin": (
+        "やることを棚卸し→期限→提出先→必要書類の順で整理",
+        "チェックリストは“提出単位”で作る（書類1つ=1項目）",
+        "片付けは範囲を小さく切る（引き出し1つなど）",
+        "ルーティンは固定時刻に置く（毎週/毎月で繰り返し）",
+    ),
+    "Shopping/Products": (
+        "比較軸を決める（価格/保証/サイズ/耐久/用途）",
+        "必要十分スペックを先に確定（上位互換を追わない）",
+        "レビューは低評価→中評価→高評価の順で読む（地雷回避）",
+        "返品条件と到着日を最後に確認して購入",
+    ),
+    "Events/Leisure": (
+        "候補を3つまでに絞る（増やすほど決められない）",
+        "天気・混雑・移動時間を先に置く（当日崩壊を防ぐ）",
+        "予約/支払い/持ち物を前日までに確定",
+        "同行者がいるなら希望を1枚にまとめて合意",
+    ),
+}
+
+
 def build_steps(category: str) -> List[str]:
     """
     Step-by-step checklist generator.
     NOTE: この関数は SyntaxError の原因になりやすいので、
           括弧やクォートの閉じ忘れが起きない “安全な固定形” にしています。
     """
-    steps: List[str] = [
-        "再現条件を固定する（同じ入力・同じ手順・同じ端末/ブラウザで再現）",
-        "表示/ログをそのまま保存（コピペ/スクショ、時刻も残す）",
-        "影響範囲が小さい順に確認（確認→読み取り→最小変更→検証）",
-        "直ったら差分を記録し、再発防止チェックを作る（次回3分復旧が目標）",
-    ]
-
-    if category in ["Web/Hosting", "AI/Automation"]:
-        steps += [
-            "上書き禁止を強制する（衝突は -2/-3、凍結パスは触らない）",
-            "ログ粒度を上げる（HTTPステータス/例外/レスポンス先頭）",
-        ]
-
-    if category == "Travel/Planning":
-        steps += [
-            "日数・出発/帰宅時刻・絶対にやりたいこと（3つ）を先に固定",
-            "移動時間を先に置いて、残りに観光を入れる（詰め込み防止）",
-            "持ち物を「必須/現地調達/予備」に分けてチェックリスト化",
-            "予算を「宿/交通/食/観光/予備費」に割って上限を決める",
-        ]
-
-    if category == "Food/Cooking":
-        steps += [
-            "主菜を先に決める（3〜5個）→副菜→主食の順で決める",
-            "買い物リストをカテゴリ別（肉/野菜/調味料…）に出す",
-            "作り置きは保存日数ベースで回す（先に消費順を決める）",
-            "調理は同時進行しやすい順に並べる（焼く/茹でる/切る）",
-        ]
-
-    if category == "Health/Fitness":
-        steps += [
-            "まず睡眠を固定（就寝/起床の時刻を先に決める）",
-            "運動は最小単位から（例：腕立て5回/散歩10分）",
-            "週の回数→強度の順で上げる（いきなり強度は上げない）",
-            "記録は1項目だけ（体重/歩数/睡眠など）から開始",
-        ]
-
-    if category == "Study/Learning":
-        steps += [
-            "目標を「今週の量」→「今日の量」に割る（最小単位を作る）",
-            "復習は翌日/3日後/7日後の固定枠で回す",
-            "教材は同時に2つまで（増やすほど迷う）",
-            "集中は環境で作る（通知OFF/場所固定/開始の儀式）",
-        ]
-
-    if category == "Money/Personal Finance":
-        steps += [
-            "固定費/変動費/特別費に分けて、まず固定費から最適化",
-            "手数料/返金条件/解約条件を“先に”確認して事故を防ぐ",
-            "支払い日・引き落とし日をカレンダーに固定（ズレで詰まない）",
-            "比較軸（総額/利便性/リスク）を1枚にまとめて決め切る",
-        ]
-
-    if category == "Career/Work":
-        steps += [
-            "実績は数字で書く（例：改善率/件数/期間/役割）",
-            "職務要約は3行で結論→根拠→再現性の順",
-            "応募先ごとに要点だけ差し替える（全部を書き換えない）",
-            "面接は想定質問を先に潰す（自己紹介/志望動機/強み/弱み）",
-        ]
-
-    if category == "Relationships/Communication":
-        steps += [
-            "文を短くする（1文1要点、余計な前置きを削る）",
-            "お願い/断り/お礼の型を使う（毎回ゼロから考えない）",
-            "相手の温度感に合わせて情報量を調整する",
-            "返信が不安なら“選択肢”で返す（AかB、どっちがいい？形式）",
-        ]
-
-    if category == "Home/Life Admin":
-        steps += [
-            "やることを棚卸し→期限→提出先→必要書類の順で整理",
-            "チェックリストは“提出単位”で作る（書類1つ=1項目）",
-            "片付けは範囲を小さく切る（引き出し1つなど）",
-            "ルーティンは固定時刻に置く（毎週/毎月で繰り返し）",
-        ]
-
-    if category == "Shopping/Products":
-        steps += [
-            "比較軸を決める（価格/保証/サイズ/耐久/用途）",
-            "必要十分スペックを先に確定（上位互換を追わない）",
-            "レビューは低評価→中評価→高評価の順で読む（地雷回避）",
-            "返品条件と到着日を最後に確認して購入",
-        ]
-
-    if category == "Events/Leisure":
-        steps += [
-            "候補を3つまでに絞る（増やすほど決められない）",
-            "天気・混雑・移動時間を先に置く（当日崩壊を防ぐ）",
-            "予約/支払い/持ち物を前日までに確定",
-            "同行者がいるなら希望を1枚にまとめて合意",
-        ]
-
+    steps = list(BASE_STEPS)
+    steps.extend(CATEGORY_STEPS.get(category, ()))
     # 余分に増えすぎないように上限
     return steps[:28]
 
@@ -2012,6 +2144,15 @@ def supplemental_resources_for_category(category: str) -> List[str]:
 
 
 
+# well-known docs mixed into every page's references (constant; built once)
+REFERENCE_EXTRAS: Tuple[str, ...] = (
+    "https://support.google.com/webmasters/answer/156184",
+    "https://developers.google.com/search/docs/crawling-indexing/sitemaps/overview",
+    "https://developer.mozilla.org/en-US/docs/Web/SEO",
+    "https://developers.google.com/search/docs/crawling-indexing/robots/intro",
+)
+
+
 def pick_reference_urls(theme: Theme) -> List[str]:
     """
     References: 10-20 “source-like” URLs.
@@ -2025,13 +2166,7 @@ def pick_reference_urls(theme: Theme) -> List[str]:
 
     supp = supplemental_resources_for_category(theme.category)
     # mix-in to reach REF_URL_MIN
-    extras = [
-        "https://support.google.com/webmasters/answer/156184",
-        "https://developers.google.com/search/docs/crawling-indexing/sitemaps/overview",
-        "https://developer.mozilla.org/en-US/docs/Web/SEO",
-        "https://developers.google.com/search/docs/crawling-indexing/robots/intro",
-    ]
-    pool = uniq_keep_order(supp + extras)
+    pool = uniq_keep_order(supp + list(REFERENCE_EXTRAS))
     random.shuffle(pool)
 
     for u in pool:
@@ -2044,65 +2179,87 @@ def pick_reference_urls(theme: Theme) -> List[str]:
     return refs[: clamp(REF_URL_MAX, REF_URL_MIN, 30)]
 
 
+ARTICLE_PAD_JA = (
+    "【追加メモ】\n"
+    "問題が複雑に見える時ほど、最初に“変えた点”を列挙し、それを一つずつ戻して差分を取ると復旧が早くなります。\n"
+    "ログがない場合は、まずログを作ることが最短ルートです。\n"
+)
+
+ARTICLE_WHY_JA = (
+    "多くのトラブルは、(1)設定の不一致、(2)権限や期限、(3)キャッシュ/反映待ち、"
+    "(4)入力条件の揺れ、のどれかに落ちます。\n"
+    "つまり、この4点を順に潰すだけで“直らない理由”の大半は説明できます。\n"
+)
+
+ARTICLE_DETAIL_JA = (
+    "大事なのは「最小変更」です。一度に複数箇所をいじると、直ったとしても原因が分からず再発します。\n"
+    "最小変更→検証→記録、を守ると、次回はチェックリストだけで復旧できます。\n"
+)
+
+ARTICLE_VERIFY_JA = (
+    "【検証のコツ】\n"
+    "- “期待結果”を1文にする（何ができれば成功か）\n"
+    "- 失敗が出たら、入力・環境・時刻・ログをセットで残す\n"
+    "- 直った瞬間に、何を変えたかを1行で書ける状態にする\n"
+    "- 再発防止は“次回3分で復旧できるか”で判断する\n"
+    "これだけで、調査が感情ではなく手順になります。\n"
+)
+
+ARTICLE_TREE_JA = (
+    "【切り分けの分岐（迷った時用）】\n"
+    "1) 別ブラウザ/別端末でも同じ？\n"
+    "  - はい → サービス/設定/権限側が濃厚\n"
+    "  - いいえ → キャッシュ/拡張機能/端末依存が濃厚\n"
+    "2) 同じ入力・同じ手順で再現する？\n"
+    "  - はい → 原因追跡が可能。ログを増やして一点ずつ潰す\n"
+    "  - いいえ → 入力条件が揺れている。まず再現条件の固定が最優先\n"
+    "この分岐を守るだけで、無駄な試行をかなり減らせます。\n"
+)
+
+
+def write_bullet_section(buf: io.StringIO, header: str, items: Iterable[str]) -> None:
+    # header + "- item" 行 + 末尾改行（items が空でも空行 1 つ）を buf に直接書く
+    buf.write(header)
+    buf.write("\n".join([f"- {x}" for x in items]))
+    buf.write("\n")
+
+
 def generate_long_article_ja(theme: Theme) -> str:
     """
     Must be >= MIN_ARTICLE_CHARS_JA chars.
     Deterministic long form to guarantee volume without OpenAI.
     """
-    intro = (
+    buf = io.StringIO()
+    # intro (カテゴリ入り) → 固定文 → カテゴリ別リスト → 固定文。各セクションの間は空行 1 つ
+    buf.write(
         f"このページは「{theme.category}」でよく起きる悩みを、"
         f"短時間で安全に整理して解決へ進めるためのガイドです。\n"
         "ポイントは“推測で決め打ちしない”こと。再現条件を固定し、"
         "影響範囲が小さい順にチェックするだけで、無駄な試行回数が大きく減ります。\n"
     )
-    why = (
-        "多くのトラブルは、(1)設定の不一致、(2)権限や期限、(3)キャッシュ/反映待ち、"
-        "(4)入力条件の揺れ、のどれかに落ちます。\n"
-        "つまり、この4点を順に潰すだけで“直らない理由”の大半は説明できます。\n"
-    )
-    detail = (
-        "大事なのは「最小変更」です。一度に複数箇所をいじると、直ったとしても原因が分からず再発します。\n"
-        "最小変更→検証→記録、を守ると、次回はチェックリストだけで復旧できます。\n"
-    )
-
-    examples = "【このページで扱う悩み一覧（例）】\n" + "\n".join([f"- {p}" for p in theme.problem_list]) + "\n"
-    causes = "【原因のパターン分け】\n" + "\n".join([f"- {c}" for c in build_causes(theme.category)]) + "\n"
-    steps = "【手順（チェックリスト）】\n" + "\n".join([f"- {s}" for s in build_steps(theme.category)]) + "\n"
-    pitfalls = "【よくある失敗と回避策】\n" + "\n".join([f"- {p}" for p in build_pitfalls(theme.category)]) + "\n"
-    nxt = "【直らない場合の次の手】\n" + "\n".join([f"- {n}" for n in build_next_actions(theme.category)]) + "\n"
-
-    verify = (
-        "【検証のコツ】\n"
-        "- “期待結果”を1文にする（何ができれば成功か）\n"
-        "- 失敗が出たら、入力・環境・時刻・ログをセットで残す\n"
-        "- 直った瞬間に、何を変えたかを1行で書ける状態にする\n"
-        "- 再発防止は“次回3分で復旧できるか”で判断する\n"
-        "これだけで、調査が感情ではなく手順になります。\n"
-    )
-
-    tree = (
-        "【切り分けの分岐（迷った時用）】\n"
-        "1) 別ブラウザ/別端末でも同じ？\n"
-        "  - はい → サービス/設定/権限側が濃厚\n"
-        "  - いいえ → キャッシュ/拡張機能/端末依存が濃厚\n"
-        "2) 同じ入力・同じ手順で再現する？\n"
-        "  - はい → 原因追跡が可能。ログを増やして一点ずつ潰す\n"
-        "  - いいえ → 入力条件が揺れている。まず再現条件の固定が最優先\n"
-        "この分岐を守るだけで、無駄な試行をかなり減らせます。\n"
-    )
-
-    body = "\n".join([intro, why, detail, examples, causes, steps, pitfalls, nxt, verify, tree]).strip()
+    for part in (ARTICLE_WHY_JA, ARTICLE_DETAIL_JA):
+        buf.write("\n")
+        buf.write(part)
+    for header, items in (
+        ("【このページで扱う悩み一覧（例）】\n", theme.problem_list),
+        ("【原因のパターン分け】\n", build_causes(theme.category)),
+        ("【手順（チェックリスト）】\n", build_steps(theme.category)),
+        ("【よくある失敗と回避策】\n", build_pitfalls(theme.category)),
+        ("【直らない場合の次の手】\n", build_next_actions(theme.category)),
+    ):
+        buf.write("\n")
+        write_bullet_section(buf, header, items)
+    for part in (ARTICLE_VERIFY_JA, ARTICLE_TREE_JA):
+        buf.write("\n")
+        buf.write(part)
+
+    body = buf.getvalue().strip()
 
     # pad to guarantee chars
     if len(body) < MIN_ARTICLE_CHARS_JA:
-        pads: List[str] = []
-        while len(body) + sum(len(x) for x in pads) < MIN_ARTICLE_CHARS_JA + 200:
-            pads.append(
-                "【追加メモ】\n"
-                "問題が複雑に見える時ほど、最初に“変えた点”を列挙し、それを一つずつ戻して差分を取ると復旧が早くなります。\n"
-                "ログがない場合は、まずログを作ることが最短ルートです。\n"
-            )
-        body = body + "\n" + "\n".join(pads)
+        # 必要な個数を一度で計算する（毎回 sum() し直すループは O(n^2)）
+        n = -(-(MIN_ARTICLE_CHARS_JA + 200 - len(body)) // len(ARTICLE_PAD_JA))
+        body = body + "\n" + "\n".join([ARTICLE_PAD_JA] * n)
 
     return body.strip()
 
@@ -2744,6 +2901,46 @@ def fetch_unsplash_bg_url() -> str:
         return ""
 
 
+# <li> lists: each list is built in a single join; rows use one %-template each
+LI_TMPL = "<li class='py-1'>%s</li>"
+URL_LI_TMPL = "<li class='py-1'><a class='underline break-all' href='%s' target='_blank' rel='noopener'>%s</a></li>"
+TOOL_LI_TMPL = ("<li class='py-1'><a class='underline' href='%s'>%s</a> "
+                "<span class='text-white/50 text-xs'>(%s)</span></li>")
+
+
+def render_li_items(items: Iterable[str]) -> str:
+    return "\n".join([LI_TMPL % html_escape(x) for x in items])
+
+
+def render_url_li_items(urls: Iterable[str]) -> str:
+    out: List[str] = []
+    for u in urls:
+        eu = html_escape(u)  # escape once; used for both href and label
+        out.append(URL_LI_TMPL % (eu, eu))
+    return "\n".join(out)
+
+
+def render_tool_li_items(tools: List[Dict[str, Any]]) -> str:
+    if not tools:
+        return ""  # first run / empty inventory: nothing to render
+    return "\n".join([
+        TOOL_LI_TMPL % (html_escape(t.get('url','#')), html_escape(t.get('title','Tool')), html_escape(t.get('category','')))
+        for t in tools
+    ])
+
+
+@lru_cache(maxsize=None)
+def category_sections_html(category: str) -> Tuple[str, str, str, str]:
+    # causes / steps / pitfalls / next の <li> はカテゴリだけで決まる。
+    # 同カテゴリのページや autofix の再描画で作り直さないようにキャッシュする
+    return (
+        render_li_items(build_causes(category)),
+        render_li_items(build_steps(category)),
+        render_li_items(build_pitfalls(category)),
+        render_li_items(build_next_actions(category)),
+    )
+
+
 def build_page_html(
     theme: Theme,
     tool_url: str,
@@ -2757,18 +2954,10 @@ def build_page_html(
     popular_sites: List[Dict[str, Any]],
     hero_bg_url: str = "",
 ) -> str:
-    problems_html = "\n".join([f"<li class='py-1'>{html_escape(p)}</li>" for p in theme.problem_list])
+    problems_html = render_li_items(theme.problem_list)
 
     quick_answer = build_quick_answer(theme.category, theme.keywords)
-    causes = build_causes(theme.category)
-    steps = build_steps(theme.category)
-    pitfalls = build_pitfalls(theme.category)
-    next_actions = build_next_actions(theme.category)
-
-    causes_html = "\n".join([f"<li class='py-1'>{html_escape(c)}</li>" for c in causes])
-    steps_html = "\n".join([f"<li class='py-1'>{html_escape(s)}</li>" for s in steps])
-    pitfalls_html = "\n".join([f"<li class='py-1'>{html_escape(p)}</li>" for p in pitfalls])
-    next_html = "\n".join([f"<li class='py-1'>{html_escape(n)}</li>" for n in next_actions])
+    causes_html, steps_html, pitfalls_html, next_html = category_sections_html(theme.category)
 
     faq_html = "\n".join([
         f"""
@@ -2780,8 +2969,8 @@ def build_page_html(
         for q, a in faq
     ])
 
-    ref_html = "\n".join([f"<li class='py-1'><a class='underline break-all' href='{html_escape(u)}' target='_blank' rel='noopener'>{html_escape(u)}</a></li>" for u in references])
-    sup_html = "\n".join([f"<li class='py-1'><a class='underline break-all' href='{html_escape(u)}' target='_blank' rel='noopener'>{html_escape(u)}</a></li>" for u in supplements])
+    ref_html = render_url_li_items(references)
+    sup_html = render_url_li_items(supplements)
 
     # affiliates slot: top2
     aff_blocks = []
@@ -2805,17 +2994,8 @@ def build_page_html(
         """.strip()]
     aff_html = "\n".join(aff_blocks)
 
-    related_html = "\n".join([
-        f"<li class='py-1'><a class='underline' href='{html_escape(t.get('url','#'))}'>{html_escape(t.get('title','Tool'))}</a> "
-        f"<span class='text-white/50 text-xs'>({html_escape(t.get('category',''))})</span></li>"
-        for t in related_tools
-    ])
-
-    popular_html = "\n".join([
-        f"<li class='py-1'><a class='underline' href='{html_escape(t.get('url','#'))}'>{html_escape(t.get('title','Tool'))}</a> "
-        f"<span class='text-white/50 text-xs'>({html_escape(t.get('category',''))})</span></li>"
-        for t in popular_sites
-    ])
+    related_html = render_tool_li_items(related_tools)
+    popular_html = render_tool_li_items(popular_sites)
 
     canonical = tool_url if tool_url.startswith("http") else (SITE_DOMAIN.rstrip("/") + "/" + theme.slug + "/")
 
@@ -3121,19 +3301,45 @@ function copyTextFrom(inputId, btnId) {{
 # =============================================================================
 # Site building helpers (slug collision safe, related/popular)
 # =============================================================================
+# PAGES_DIR listing, read once per run. Slugs handed out this run are tracked in _allocated_slugs
+# (their dirs may not exist yet), so the no-overwrite rule never depends on directory mtimes.
+_pages_listing: Optional[frozenset] = None
+_allocated_slugs: Set[str] = set()
+
+def existing_page_slugs() -> frozenset:
+    global _pages_listing
+    if _pages_listing is None:
+        try:
+            _pages_listing = frozenset(os.listdir(PAGES_DIR))
+        except OSError:
+            _pages_listing = frozenset()
+    return _pages_listing
+
+
+def slug_taken(slug: str) -> bool:
+    return slug in _allocated_slugs or slug in existing_page_slugs()
+
+
+# base slug -> next "-N" suffix to try this run (suffixes below it are taken or already handed out)
+_slug_next_suffix: Dict[str, int] = {}
+
 def allocate_unique_slug(base_slug: str) -> str:
     """
     No-overwrite rule: if goliath/pages/<slug> exists, use -2, -3...
     """
     base = safe_slug(base_slug)
-    if not os.path.exists(os.path.join(PAGES_DIR, base)):
-        return base
-    for i in range(2, 100):
-        cand = f"{base}-{i}"
-        if not os.path.exists(os.path.join(PAGES_DIR, cand)):
-            return cand
-    # extremely unlikely
-    return f"{base}-{sha1(base)[:6]}"
+    slug = base
+    if slug_taken(base):
+        slug = f"{base}-{sha1(base)[:6]}"  # extremely unlikely
+        # 同じ base で何度も衝突する場合、前回渡した番号の次から探し始める
+        for i in range(_slug_next_suffix.get(base, 2), 100):
+            cand = f"{base}-{i}"
+            if not slug_taken(cand):
+                _slug_next_suffix[base] = i + 1
+                slug = cand
+                break
+    _allocated_slugs.add(slug)
+    return slug
 
 
 def site_url_for_slug(slug: str) -> str:
@@ -3145,11 +3351,14 @@ def site_url_for_slug(slug: str) -> str:
 
 
 def choose_related_tools(all_sites: List[Dict[str, Any]], category: str, exclude_slug: str, n: int = 5) -> List[Dict[str, Any]]:
+    if not all_sites or n <= 0:
+        return []
+    # shuffle して先頭 n 件 = 無作為な n 件。全件 shuffle せず random.sample で必要な分だけ引く
     same = [s for s in all_sites if s.get("category") == category and s.get("slug") != exclude_slug]
-    other = [s for s in all_sites if s.get("slug") != exclude_slug]
-    random.shuffle(same)
-    random.shuffle(other)
-    picks = (same + other)[:n]
+    picks = random.sample(same, min(n, len(same)))
+    if len(picks) < n:
+        other = [s for s in all_sites if s.get("slug") != exclude_slug]
+        picks += random.sample(other, min(n - len(picks), len(other)))
     return [{"title": s.get("search_title") or s.get("title", "Tool"), "url": s.get("url", "#"), "category": s.get("category", ""), "slug": s.get("slug", "")} for s in picks]
 
 
@@ -3167,9 +3376,11 @@ def compute_popular_sites(all_sites: List[Dict[str, Any]], n: int = 6) -> List[D
         except Exception:
             return 0.0
 
-    sites = list(all_sites)
-    sites.sort(key=lambda x: metric(x), reverse=True)
-    return [{"title": s.get("search_title") or s.get("title", "Tool"), "url": s.get("url", "#"), "category": s.get("category", ""), "slug": s.get("slug", "")} for s in sites[:n]]
+    if not all_sites or n <= 0:
+        return []
+    # 上位 n 件だけ必要なので全件ソートしない（nlargest は sorted(reverse=True)[:n] と同順）
+    sites = heapq.nlargest(n, all_sites, key=metric)
+    return [{"title": s.get("search_title") or s.get("title", "Tool"), "url": s.get("url", "#"), "category": s.get("category", ""), "slug": s.get("slug", "")} for s in sites]
 
 
 # =============================================================================
@@ -3273,19 +3484,17 @@ def ensure_policies() -> List[str]:
 # Sitemap + robots + ping
 # =============================================================================
 def build_sitemap(urls: List[str]) -> str:
-    urls = uniq_keep_order([u for u in urls if isinstance(u, str) and u.startswith("http")])
     lastmod = dt.datetime.now(dt.timezone.utc).date().isoformat()
-    items = []
-    for u in urls:
-        items.append(
-            f"<url><loc>{html_escape(u)}</loc><lastmod>{lastmod}</lastmod></url>"
-        )
-    xml = f"""<?xml version="1.0" encoding="UTF-8"?>
-<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
-{''.join(items)}
-</urlset>
-"""
-    return xml
+    buf = io.StringIO()
+    buf.write('<?xml version="1.0" encoding="UTF-8"?>\n<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n')
+    # 各 <url> の後半は全 URL 共通なので 1 回だけ組み立てる
+    tail = f"</loc><lastmod>{lastmod}</lastmod></url>"
+    esc = html.escape  # u は str 確定なので html_escape の None ガードは不要
+    # dict.fromkeys: 順序を保った重複除去を1パスで
+    for u in dict.fromkeys(u for u in urls if isinstance(u, str) and u.startswith("http")):
+        buf.write(f"<url><loc>{esc(u)}{tail}")
+    buf.write("\n</urlset>\n")
+    return buf.getvalue()
 
 
 def build_robots(sitemap_url: str) -> str:
@@ -3312,12 +3521,12 @@ def ping_search_engines(sitemap_url: str) -> None:
 # =============================================================================
 # Validation + Auto-fix (up to MAX_AUTOFIX)
 # =============================================================================
-REQUIRED_MARKERS = [
+REQUIRED_MARKERS = (
     "AFF_SLOT",
     "Long guide (JP, 2500+ chars)",
     "Reference links",
     "<script src=\"https://cdn.tailwindcss.com\"></script>",
-]
+)
 
 def validate_site_html(html_text: str) -> List[str]:
     errs: List[str] = []
@@ -3328,9 +3537,10 @@ def validate_site_html(html_text: str) -> List[str]:
         if m not in html_text:
             errs.append(f"missing:{m}")
     # article length check: crude
-    if "Long guide (JP" in html_text:
+    # len() は O(1) なので先に判定し、長いページでは全文走査（in / count）をしない
+    if len(html_text) < 12000 and "Long guide (JP" in html_text:
         # ensure article content roughly long
-        if html_text.count("【") < 6 and len(html_text) < 12000:
+        if html_text.count("【") < 6:
             errs.append("article_maybe_too_short")
     return errs
 
@@ -3338,19 +3548,22 @@ def validate_site_html(html_text: str) -> List[str]:
 # =============================================================================
 # Reply generation (EN, short, no “AI/bot” words, URL last line)
 # =============================================================================
-FORBIDDEN_REPLY_WORDS = ["ai", "bot", "automation", "automated"]
+FORBIDDEN_REPLY_WORDS = ("ai", "bot", "automation", "automated")
+# summary の出し分け用（呼び出しごとにリストを作らないよう module 定数に）
+REPLY_STUCK_WORDS = ("overwhelmed", "confused", "stuck", "don’t know")
+REPLY_URGENT_WORDS = ("today", "tomorrow", "this week", "urgent", "deadline")
 
 def openai_generate_reply_stub(post: Post, tool_url: str) -> str:
     """
     Deterministic reply. 280-400 chars target. English. Last line is URL only.
     """
     # empathy first
-    t = post.norm_text()
+    t = post.norm_text().lower()
     # short summary (very light)
     summary = "That sounds frustrating—especially when you’re trying to decide quickly."
-    if any(w in t.lower() for w in ["overwhelmed", "confused", "stuck", "don’t know"]):
+    if any(w in t for w in REPLY_STUCK_WORDS):
         summary = "That sounds really overwhelming—especially when you’re stuck and need a clear next step."
-    elif any(w in t.lower() for w in ["today", "tomorrow", "this week", "urgent", "deadline"]):
+    elif any(w in t for w in REPLY_URGENT_WORDS):
         summary = "That’s stressful—especially with the clock ticking."
 
     line2 = "I put together a simple one-page guide + checklist that should help you move forward:"
@@ -3377,7 +3590,7 @@ def make_stub_posts(n: int) -> List[Post]:
     for i in range(n):
         stubs.append(Post(
             source="stub",
-            id=sha1(f"stub:{RUN_ID}:{i}"),
+            id=post_id(f"stub:{RUN_ID}:{i}"),
             url=f"{SITE_DOMAIN.rstrip('/')}/goliath/_out/stub/{RUN_ID}/{i}",
             text="Need a checklist / template for a common problem.",
             author="unknown",
@@ -3401,19 +3614,18 @@ def build_issue_items(posts: List[Post], post_to_tool_url: Dict[str, str]) -> Li
     return items
 
 
-def chunk_issue_bodies(items: List[Dict[str, str]], chunk_size: int = 40) -> List[str]:
-    bodies: List[str] = []
-    for i in range(0, len(items), chunk_size):
-        chunk = items[i:i+chunk_size]
-        lines: List[str] = []
-        for it in chunk:
-            lines.append(f"Problem URL: {it['problem_url']}")
-            lines.append("Reply:")
-            lines.append(it["reply"])
-            lines.append("")  # blank
-            lines.append("---")
-        bodies.append("\n".join(lines).rstrip() + "\n")
-    return bodies
+def issue_part_count(n_items: int, chunk_size: int = 40) -> int:
+    return -(-n_items // chunk_size)
+
+
+def chunk_issue_bodies(items: List[Dict[str, str]], chunk_size: int = 40) -> Iterator[str]:
+    # 1 part ずつ生成（全 body をリストに溜めない）。総数は issue_part_count で先に出す
+    rest = iter(items)
+    for _ in range(issue_part_count(len(items), chunk_size)):
+        buf = io.StringIO()
+        for it in itertools.islice(rest, chunk_size):
+            buf.write(f"Problem URL: {it['problem_url']}\nReply:\n{it['reply']}\n\n---\n")
+        yield buf.getvalue().rstrip() + "\n"
 
 
 def write_issues_payload(items: List[Dict[str, str]], extra_notes: str = "") -> str:
@@ -3421,10 +3633,10 @@ def write_issues_payload(items: List[Dict[str, str]], extra_notes: str = "") ->
     Write JSON with titles/bodies for GitHub issues.
     Returns path to JSON.
     """
-    bodies = chunk_issue_bodies(items, ISSUE_MAX_ITEMS)
+    total = issue_part_count(len(items), ISSUE_MAX_ITEMS)
     payloads: List[Dict[str, str]] = []
-    for idx, body in enumerate(bodies, start=1):
-        title = f"Goliath reply candidates ({RUN_ID}) part {idx}/{len(bodies)}"
+    for idx, body in enumerate(chunk_issue_bodies(items, ISSUE_MAX_ITEMS), start=1):
+        title = f"Goliath reply candidates ({RUN_ID}) part {idx}/{total}"
         if extra_notes and idx == 1:
             body = extra_notes.strip() + "\n\n" + body
         payloads.append({"title": title, "body": body})
@@ -3437,32 +3649,45 @@ def write_issues_payload(items: List[Dict[str, str]], extra_notes: str = "") ->
 # =============================================================================
 # Orchestration
 # =============================================================================
+def collect_result(fut: "Future[List[Post]]", name: str) -> List[Post]:
+    # 1ソースの失敗で全体を止めない
+    try:
+        return fut.result()
+    except Exception as e:
+        logging.warning("%s: collector failed: %s", name, e)
+        return []
+
+
 def collect_all() -> List[Post]:
     # per spec targets:
     # Bluesky 50, Mastodon 100, Reddit 20, X 1(mentions), HN (rest)
-    bs = collect_bluesky(max_items=50)
-    ms = collect_mastodon(max_items=100)
-    rd = collect_reddit(max_items=20)
-    xx = collect_x_mentions(max_items=max(1, min(X_MAX, 5)))
-    hn = collect_hn(max_items=HN_MAX)
-
-    all_posts = bs + ms + rd + xx + hn
-    # filter dup urls
-    seen = set()
-    out: List[Post] = []
-    for p in all_posts:
-        if not p.url:
+    # sources are independent and IO-bound: fetch them concurrently, merge in fixed order
+    with ThreadPoolExecutor(max_workers=5) as ex:
+        f_bs = ex.submit(collect_bluesky, max_items=50)
+        f_ms = ex.submit(collect_mastodon, max_items=100)
+        f_rd = ex.submit(collect_reddit, max_items=20)
+        f_xx = ex.submit(collect_x_mentions, max_items=min(X_MAX, 5))
+        f_hn = ex.submit(collect_hn, max_items=HN_MAX)
+    bs = collect_result(f_bs, "Bluesky")
+    ms = collect_result(f_ms, "Mastodon")
+    rd = collect_result(f_rd, "Reddit")
+    xx = collect_result(f_xx, "X")
+    hn = collect_result(f_hn, "HN")
+
+    # filter dup urls (chain: no intermediate concatenated list)
+    # url は既にユニークなキーなので、そのまま dict のキーにする（挿入順を保持）
+    by_url: Dict[str, Post] = {}
+    for p in itertools.chain(bs, ms, rd, xx, hn):
+        # cap MAX_COLLECT: 上限に達したら残りは見ない
+        if len(by_url) >= MAX_COLLECT:
+            break
+        if not p.url or p.url in by_url:
             continue
         if adult_or_sensitive(p.text):
             continue
-        key = sha1(p.url)
-        if key in seen:
-            continue
-        seen.add(key)
-        out.append(p)
+        by_url[p.url] = p
 
-    # cap MAX_COLLECT
-    out = out[:MAX_COLLECT]
+    out = list(by_url.values())
     logging.info("Collected total=%d (Bluesky=%d, Mastodon=%d, Reddit=%d, X=%d, HN=%d)",
                  len(out), len(bs), len(ms), len(rd), len(xx), len(hn))
     return out
@@ -3470,9 +3695,11 @@ def collect_all() -> List[Post]:
 
 def choose_themes(posts: List[Post], max_themes: int) -> List[Theme]:
     clusters = cluster_posts(posts, threshold=0.22)
-    themes = [make_theme(c) for c in clusters if len(c) >= 2]
-    themes.sort(key=lambda t: t.score, reverse=True)
-    return themes[:max_themes]
+    # 先にスコアだけ出し、Theme（problems 等）を組み立てるのは上位 max_themes 件だけ
+    scored = [(c, theme_signals(c)) for c in clusters if len(c) >= 2]
+    # 上位 max_themes 件だけ欲しいので全件ソートしない（nlargest は sorted(reverse=True)[:n] と同順・同点は元の順）
+    top = heapq.nlargest(max_themes, scored, key=lambda cs: cs[1][0])
+    return [make_theme(c, signals) for c, signals in top]
 
 
 def build_sites(themes: List[Theme], aff_norm: Dict[str, List[Dict[str, Any]]], all_sites_inventory: List[Dict[str, Any]], hero_bg_url: str) -> Tuple[List[Theme], List[Dict[str, Any]], Dict[str, str], List[str]]:
@@ -3494,6 +3721,9 @@ def build_sites(themes: List[Theme], aff_norm: Dict[str, List[Dict[str, Any]]],
     # compute popular once from current inventory
     popular_now = compute_popular_sites(all_sites_inventory, n=8)
 
+    # related 候補 = 既存 inventory + 今回作ったページ。ページごとに連結し直さず、作るたびに追記する
+    inventory_for_related: List[Dict[str, Any]] = list(all_sites_inventory)
+
     for theme in themes:
         # allocate collision-safe slug
         final_slug = allocate_unique_slug(theme.slug)
@@ -3521,7 +3751,6 @@ def build_sites(themes: List[Theme], aff_norm: Dict[str, List[Dict[str, Any]]],
         aff_top2 = pick_affiliates_for_category(aff_norm, theme.category, topn=2)
 
         # related tools from existing inventory + new ones (accumulate)
-        inventory_for_related = all_sites_inventory + new_inventory_entries
         related = choose_related_tools(inventory_for_related, theme.category, exclude_slug=final_slug, n=5)
 
         # build html
@@ -3543,10 +3772,13 @@ def build_sites(themes: List[Theme], aff_norm: Dict[str, List[Dict[str, Any]]],
         attempts = 0
         errs = validate_site_html(html_text)
         while errs and attempts < MAX_AUTOFIX:
+            # 自動修正できるのは記事の水増しだけ。マーカー欠落などは同じテンプレを
+            # 何度描き直しても変わらないので、全文の再生成＋再検証はしない
+            if "article_maybe_too_short" not in errs:
+                break
             attempts += 1
-            # simple autofix: pad article, ensure markers
-            if "article_maybe_too_short" in errs:
-                article_ja = article_ja + "\n" + ("【追加メモ】\n" + "確認→最小変更→検証→記録、の順番を崩さないことが最短です。\n") * 8
+            # simple autofix: pad article
+            article_ja = article_ja + "\n" + ("【追加メモ】\n" + "確認→最小変更→検証→記録、の順番を崩さないことが最短です。\n") * 8
             # rebuild html after pad
             html_text = build_page_html(
                 theme=theme,
@@ -3576,6 +3808,7 @@ def build_sites(themes: List[Theme], aff_norm: Dict[str, List[Dict[str, Any]]],
         sitemap_urls.append(short_url)
 
         # inventory entry
+        stamp = now_iso()
         entry = {
             "slug": final_slug,
             "title": theme.title,
@@ -3583,11 +3816,12 @@ def build_sites(themes: List[Theme], aff_norm: Dict[str, List[Dict[str, Any]]],
             "category": theme.category,
             "url": tool_url,
             "short_url": short_url,
-            "created_at": now_iso(),
-            "updated_at": now_iso(),
+            "created_at": stamp,
+            "updated_at": stamp,
             "keywords": theme.keywords[:12],
         }
         new_inventory_entries.append(entry)
+        inventory_for_related.append(entry)
 
         # map representative posts to tool url (for issue output)
         for p in theme.representative_posts:
@@ -3653,9 +3887,12 @@ def main() -> int:
     policy_urls = ensure_policies()
 
     # affiliates
-    aff_raw = load_affiliates()
-    aff_audit = audit_affiliate_keys(aff_raw)
-    aff_norm = normalize_affiliates_shape(aff_raw)
+    aff_norm, aff_audit = derive_affiliates(load_affiliates())
+
+    # hero background (optional): 収集とは独立した 1 リクエストなので、収集中に裏で取りに行く
+    hero_ex = ThreadPoolExecutor(max_workers=1)
+    hero_fut = hero_ex.submit(fetch_unsplash_bg_url)
+    hero_ex.shutdown(wait=False)
 
     # collect
     posts = collect_all()
@@ -3674,7 +3911,7 @@ def main() -> int:
         # 収集0でも最低1サイト生成
         seed_post = Post(
             source="seed",
-            id=sha1(f"seed:{RUN_ID}"),
+            id=post_id(f"seed:{RUN_ID}"),
             url=HUB_BASE_URL.rstrip("/"),
             text="seed: no posts collected this run",
             author="system",
@@ -3685,8 +3922,7 @@ def main() -> int:
 
     logging.info("Chosen themes=%d", len(themes))
 
-    # hero background (optional)
-    hero_bg = fetch_unsplash_bg_url()
+    hero_bg = hero_fut.result()
     if hero_bg:
         logging.info("Unsplash hero bg enabled.")
 
@@ -1,11 +1,16 @@
 import os
 import re
 import json
+import hashlib
+import io
+import itertools
+import threading
 import time
-import datetime
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any, List, Tuple, Optional
 
 import requests
+from urllib3.util.retry import Retry
 from openai import OpenAI
 
 # Bluesky
@@ -26,34 +31,107 @@ try:
 except Exception:
     tweepy = None
 
+# JSON (optional, faster)
+try:
+    import orjson
+except Exception:
+    orjson = None
+
+# JSON streaming (optional): db.json の先頭だけ読む
+try:
+    import ijson
+except Exception:
+    ijson = None
+
 
 ROOT = "goliath"
 DB_PATH = f"{ROOT}/db.json"
 STATE_PATH = f"{ROOT}/outreach_state.json"
+REPLIED_LOG_PATH = f"{ROOT}/outreach_replied.jsonl"  # 返信済み履歴（1行1件の追記のみ）
+REPLY_CACHE_PATH = f"{ROOT}/reply_cache.jsonl"  # 1行 {"k": key, "v": reply}。新しい分だけ追記
+REPLY_CACHE_LEGACY_PATH = f"{ROOT}/reply_cache.json"  # 旧形式（dict 丸ごと）。あれば一度だけ移す
+REPLY_CACHE_MAX = 4000  # 古いものから捨てる（挿入順。1件につき exact/near の2キー）。この2倍を超えたら詰め直す
 
 
 def now_utc_iso() -> str:
-    return datetime.datetime.utcnow().replace(microsecond=0).isoformat() + "Z"
+    # datetime はファイル後半で `from datetime import datetime` に上書きされるので time で組み立てる
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
 
 
 def read_json(path: str, default: Any) -> Any:
-    if not os.path.exists(path):
+    try:
+        with open(path, "rb") as f:
+            raw = f.read()
+    except FileNotFoundError:
         return default
-    with open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
+    if orjson is not None:
+        try:
+            return orjson.loads(raw)
+        except orjson.JSONDecodeError:
+            pass  # NaN 等は stdlib に任せる
+    return json.loads(raw.decode("utf-8"))
+
+
+def json_dumps_indent_bytes(obj: Any) -> bytes:
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            pass  # 64bit 超の int など orjson 非対応 → stdlib
+    return json.dumps(obj, ensure_ascii=False, indent=2).encode("utf-8")
 
 
 def write_json(path: str, obj: Any):
+    # tmp に書いてから os.replace（書き込み途中で落ちても state を壊さない）
+    data = json_dumps_indent_bytes(obj)
     os.makedirs(os.path.dirname(path), exist_ok=True)
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(obj, f, ensure_ascii=False, indent=2)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def load_replied() -> Dict[str, Dict[str, Any]]:
+    out: Dict[str, Dict[str, Any]] = {}
+    try:
+        f = open(REPLIED_LOG_PATH, "r", encoding="utf-8")
+    except FileNotFoundError:
+        return out
+    with f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                rec = json.loads(line)
+            except Exception:
+                continue  # 途中で切れた行などは無視
+            if isinstance(rec, dict) and rec.get("id"):
+                out[rec["id"]] = rec
+    return out
+
+
+def append_replied(records: List[Dict[str, Any]]):
+    # 全件を書き直さず、今回の分だけ追記する
+    if not records:
+        return
+    os.makedirs(os.path.dirname(REPLIED_LOG_PATH), exist_ok=True)
+    with open(REPLIED_LOG_PATH, "a", encoding="utf-8") as f:
+        f.write("".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records))
+
+
+URL_RE = re.compile(r"https?://\S+")
+NON_WORD_RE = re.compile(r"[^a-z0-9\s\-_/]")
+MULTI_SPACE_RE = re.compile(r"\s{2,}")
+SPACE_RE = re.compile(r"\s+")
+HTML_TAG_RE = re.compile(r"<[^>]+>")
 
 
 def norm_words(text: str) -> List[str]:
     t = (text or "").lower()
-    t = re.sub(r"https?://\S+", " ", t)
-    t = re.sub(r"[^a-z0-9\s\-_/]", " ", t)
-    t = re.sub(r"\s{2,}", " ", t).strip()
+    t = URL_RE.sub(" ", t)
+    t = NON_WORD_RE.sub(" ", t)
+    t = MULTI_SPACE_RE.sub(" ", t).strip()
     words = [w for w in t.split(" ") if 3 <= len(w) <= 30]
     stop = {
         "the","and","for","with","from","this","that","have","need","help","please","anyone","what",
@@ -78,24 +156,204 @@ def jaccard(a: List[str], b: List[str]) -> float:
     return len(sa & sb) / len(sa | sb)
 
 
-def pick_best_tool(db: List[Dict[str, Any]], text: str) -> Tuple[Optional[Dict[str, Any]], float]:
-    q = norm_words(text)
-    best = None
-    best_score = 0.0
-    for e in db[:200]:  # 上から新しい順に想定
+# (entries, exact, vocab): entries は (tool, 単語ビットマスク, 単語数)
+ToolIndex = Tuple[List[Tuple[Dict[str, Any], int, int]], Dict[frozenset, Dict[str, Any]], Dict[str, int]]
+
+
+TOOL_INDEX_MAX = 200  # マッチ対象にするツール数（db.json の先頭から）
+
+
+def read_db_head(path: str, n: int = TOOL_INDEX_MAX) -> List[Dict[str, Any]]:
+    # outreach は先頭 n 件しか使わないので、ijson があれば全体をパースせずに n 件で打ち切る
+    if ijson is None:
+        db = read_json(path, [])
+        return db[:n] if isinstance(db, list) else []
+    try:
+        with open(path, "rb") as f:
+            return list(itertools.islice(ijson.items(f, "item", use_float=True), n))
+    except FileNotFoundError:
+        return []
+
+
+def build_tool_index(db: List[Dict[str, Any]]) -> ToolIndex:
+    # ツール側の単語集合は候補ごとに変わらないので、1回だけ作って使い回す。
+    # 単語ごとにビット番号を振り、集合を int のビットマスクで持つ（Jaccard が & / | と bit_count で済む）
+    entries: List[Tuple[Dict[str, Any], int, int]] = []
+    exact: Dict[frozenset, Dict[str, Any]] = {}  # 単語集合 -> 最初のツール（完全一致の O(1) 判定 + 重複除去）
+    vocab: Dict[str, int] = {}
+    for e in db[:TOOL_INDEX_MAX]:  # 上から新しい順に想定
         title = e.get("title", "")
         tags = e.get("tags", []) or []
-        cand = norm_words(title) + [str(t).lower() for t in tags]
-        score = jaccard(q, cand)
+        words = frozenset(norm_words(title) + [str(t).lower() for t in tags])
+        if not words or words in exact:
+            # 単語なしは常に score 0、同じ単語集合の後続は同点で先頭に勝てない → 走査対象から外す
+            continue
+        exact[words] = e
+        mask = 0
+        for w in words:
+            mask |= 1 << vocab.setdefault(w, len(vocab))
+        entries.append((e, mask, len(words)))
+    return entries, exact, vocab
+
+
+def pick_best_tool(db: List[Dict[str, Any]], text: str,
+                   index: Optional[ToolIndex] = None) -> Tuple[Optional[Dict[str, Any]], float]:
+    q = frozenset(norm_words(text))
+    best = None
+    best_score = 0.0
+    if not q:
+        return best, best_score
+    entries, exact, vocab = index if index is not None else build_tool_index(db)
+    # 完全一致 (= 1.0) は誰にも抜かれないので、集合の lookup だけで確定
+    hit = exact.get(q)
+    if hit is not None:
+        return hit, 1.0
+    # ツール側に無い単語はビットを持たないが、和集合の大きさには len(q) で数える
+    qmask = 0
+    for w in q:
+        bit = vocab.get(w)
+        if bit is not None:
+            qmask |= 1 << bit
+    if not qmask:
+        return best, best_score
+    nq = len(q)
+    for e, mask, n in entries:
+        common = qmask & mask
+        if not common:
+            continue  # 共通語なし = score 0 は best を更新しない
+        inter = common.bit_count()
+        score = inter / (nq + n - inter)
         if score > best_score:
             best_score = score
             best = e
     return best, best_score
 
 
-def openai_reply_text(client: OpenAI, platform: str, post_text: str, tool_title: str, tool_url: str) -> str:
-    # 「疑問文に適した優しい口調で違和感ない言葉に続けてURLを添える」固定
-    prompt = f"""
+# -------------------------------
+# Reply cache: 同じ model + prompt なら OpenAI を呼ばずに前回の生成結果を使う
+# -------------------------------
+_reply_cache: Optional[Dict[str, str]] = None
+_reply_cache_on_disk = 0  # ファイルに書いてある件数（これより後ろが今回の追加分）
+_reply_cache_from_legacy = False  # 旧 reply_cache.json から読んだときだけ True（save 後に旧ファイルを消す）
+
+
+def reply_cache_key(model: str, prompt: str) -> str:
+    # ルールも含めた全文で key を取る（ルールを変えれば別 key になる）。
+    # 暗号強度は要らないキャッシュ key なので sha256 より速い blake2b（16 bytes）
+    return hashlib.blake2b((model + "\0" + REPLY_RULES + "\n\n" + prompt).encode("utf-8"), digest_size=16).hexdigest()
+
+
+REPLY_NEAR_MIN_WORDS = 5  # これより語数が少ない投稿は近似キーを作らない（別の投稿と衝突しやすい）
+
+
+def reply_near_key(model: str, post_text: str, tool_url: str) -> str:
+    # 大文字小文字・URL・記号・ストップワードだけが違う再投稿/転載は同じ返信を使い回す
+    words = norm_words(post_text)
+    if len(words) < REPLY_NEAR_MIN_WORDS:
+        return ""
+    body = model + "\0" + tool_url + "\0" + " ".join(words)
+    return "near:" + hashlib.blake2b(body.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def reply_cache_get(cache: Dict[str, str], key: str, near: str) -> Optional[str]:
+    out = cache.get(key)
+    if out is None and near:
+        out = cache.get(near)
+    return out
+
+
+def reply_cache_put(cache: Dict[str, str], key: str, near: str, out: str):
+    cache[key] = out
+    if near:
+        cache[near] = out
+
+
+def reply_cache_misses(cache: Dict[str, str], keys: List[str], nears: List[str]) -> List[int]:
+    # 近似キーが同じ投稿は先頭の1件だけ生成し、残りはその結果を使う
+    misses: List[int] = []
+    queued = set()
+    for i, (k, n) in enumerate(zip(keys, nears)):
+        if reply_cache_get(cache, k, n) is not None or (n and n in queued):
+            continue
+        if n:
+            queued.add(n)
+        misses.append(i)
+    return misses
+
+
+def load_reply_cache() -> Dict[str, str]:
+    global _reply_cache, _reply_cache_on_disk, _reply_cache_from_legacy
+    if _reply_cache is not None:
+        return _reply_cache
+    cache: Dict[str, str] = {}
+    try:
+        f = open(REPLY_CACHE_PATH, "r", encoding="utf-8")
+    except FileNotFoundError:
+        legacy = read_json(REPLY_CACHE_LEGACY_PATH, {})
+        _reply_cache = legacy if isinstance(legacy, dict) else {}
+        _reply_cache_from_legacy = True
+        return _reply_cache  # _reply_cache_on_disk = 0 なので、次の save で全件が JSONL に書かれる
+    with f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                rec = json.loads(line)
+            except Exception:
+                continue  # 途中で切れた行などは無視
+            if isinstance(rec, dict) and isinstance(rec.get("k"), str) and isinstance(rec.get("v"), str):
+                cache[rec["k"]] = rec["v"]
+    _reply_cache = cache
+    _reply_cache_on_disk = len(cache)
+    return _reply_cache
+
+
+def _reply_cache_lines(items: List[Tuple[str, str]]) -> str:
+    return "".join(json.dumps({"k": k, "v": v}, ensure_ascii=False) + "\n" for k, v in items)
+
+
+def save_reply_cache():
+    # 普段は今回増えた分だけ追記し、REPLY_CACHE_MAX の2倍を超えたら新しい REPLY_CACHE_MAX 件で書き直す
+    global _reply_cache, _reply_cache_on_disk, _reply_cache_from_legacy
+    if _reply_cache is None:
+        return
+    items = list(_reply_cache.items())
+    if len(items) > REPLY_CACHE_MAX * 2:
+        items = items[-REPLY_CACHE_MAX:]
+        _reply_cache = dict(items)
+        os.makedirs(os.path.dirname(REPLY_CACHE_PATH), exist_ok=True)
+        tmp = REPLY_CACHE_PATH + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(_reply_cache_lines(items))
+        os.replace(tmp, REPLY_CACHE_PATH)
+    elif len(items) > _reply_cache_on_disk:
+        os.makedirs(os.path.dirname(REPLY_CACHE_PATH), exist_ok=True)
+        with open(REPLY_CACHE_PATH, "a", encoding="utf-8") as f:
+            f.write(_reply_cache_lines(items[_reply_cache_on_disk:]))
+    _reply_cache_on_disk = len(items)
+    if _reply_cache_from_legacy:
+        _reply_cache_from_legacy = False
+        if os.path.exists(REPLY_CACHE_LEGACY_PATH):
+            os.remove(REPLY_CACHE_LEGACY_PATH)  # 中身は JSONL へ移し終えている
+
+
+REPLY_POST_MAX_CHARS = int(os.getenv("OUTREACH_POST_MAX_CHARS", "600"))
+
+
+def compact_post_text(text: str, limit: int = REPLY_POST_MAX_CHARS) -> str:
+    # 長文の投稿は頭と末尾だけ残す（返信の文脈には十分で、prompt token を大きく減らせる）
+    t = SPACE_RE.sub(" ", text or "").strip()
+    if limit <= 0 or len(t) <= limit:
+        return t
+    head = t[: limit * 2 // 3].rstrip()
+    tail = t[len(t) - limit // 3:].lstrip()
+    return f"{head} … [elided {len(t) - len(head) - len(tail)} chars] … {tail}"
+
+
+# 「疑問文に適した優しい口調で違和感ない言葉に続けてURLを添える」固定
+# 毎回同じ先頭部分（system）にしておくと OpenAI 側の prompt cache が効く。動的な部分は user に回す
+REPLY_RULES = """
 You write a short, natural, polite reply to an online post.
 Rules:
 - Tone: kind, non-spammy, helpful.
@@ -103,23 +361,20 @@ Rules:
 - Append the tool URL at the end on a new line.
 - Do NOT mention "AI", "automation", "bot".
 - Keep it under 280 characters if possible.
+""".strip()
 
-Post:
-{post_text}
 
-Tool URL:
-{tool_url}
-""".strip()
+def build_reply_prompt(post_text: str, tool_url: str) -> str:
+    # REPLY_RULES の後ろに付く、投稿ごとに変わる部分だけ（定数部分を毎回 f-string で組み直さない）
+    return ("Post:\n" + compact_post_text(post_text) + "\n\nTool URL:\n" + tool_url).rstrip()
 
-    r = client.chat.completions.create(
-        model=os.getenv("OPENAI_MODEL", "gpt-4o"),
-        messages=[{"role": "user", "content": prompt}],
-    )
-    out = (r.choices[0].message.content or "").strip()
+
+def finalize_reply(out: str, tool_url: str) -> str:
     # 最終ガード：URL 1回だけ
-    out = re.sub(r"\s+", " ", out).strip()
+    # リテラル置換なので正規表現は使わない（split/join は \s+ → " " + strip と同じ）
+    out = " ".join(out.split())
     if out.count(tool_url) != 1:
-        out = re.sub(re.escape(tool_url), "", out).strip()
+        out = out.replace(tool_url, "").strip()
         out = f"{out} {tool_url}".strip()
     # '?' がなければ末尾に付ける（ただし2個以上は削る）
     if "?" not in out:
@@ -131,10 +386,122 @@ Tool URL:
     return out
 
 
+def openai_reply_raw(client: OpenAI, model: str, prompt: str) -> str:
+    r = client.chat.completions.create(
+        model=model,
+        messages=[{"role": "system", "content": REPLY_RULES}, {"role": "user", "content": prompt}],
+    )
+    return (r.choices[0].message.content or "").strip()
+
+
+def openai_reply_text(client: OpenAI, platform: str, post_text: str, tool_title: str, tool_url: str) -> str:
+    prompt = build_reply_prompt(post_text, tool_url)
+    model = os.getenv("OPENAI_MODEL", "gpt-4o")
+    cache = load_reply_cache()
+    key = reply_cache_key(model, prompt)
+    near = reply_near_key(model, post_text, tool_url)
+    out = reply_cache_get(cache, key, near)
+    if out is None:
+        out = openai_reply_raw(client, model, prompt)
+        reply_cache_put(cache, key, near, out)
+    return finalize_reply(out, tool_url)
+
+
+REPLY_BATCH_SIZE = int(os.getenv("OUTREACH_REPLY_BATCH", "20"))
+REPLY_BATCH_WORKERS = max(1, int(os.getenv("OUTREACH_REPLY_WORKERS", "5")))
+
+
+REPLY_BATCH_RULES = """
+You write short, natural, polite replies to online posts.
+Rules (for each reply):
+- Tone: kind, non-spammy, helpful.
+- End with a gentle question.
+- Append that post's tool URL at the end on a new line.
+- Do NOT mention "AI", "automation", "bot".
+- Keep it under 280 characters if possible.
+
+Return a JSON object: {"replies": [{"i": <index>, "reply": "<text>"}, ...]} with exactly one reply per input post.
+""".strip()
+
+
+def openai_reply_batch(client: OpenAI, model: str, jobs: List[Tuple[str, str]]) -> Dict[int, str]:
+    """
+    jobs: [(post_text, tool_url), ...] -> {index: raw reply}
+    1回の chat completion でまとめて生成する（JSON で返させる）。
+    """
+    posts = [{"i": i, "post": compact_post_text(t), "tool_url": u} for i, (t, u) in enumerate(jobs)]
+    posts_json = orjson.dumps(posts).decode("utf-8") if orjson is not None else json.dumps(posts, ensure_ascii=False)
+    r = client.chat.completions.create(
+        model=model,
+        messages=[
+            {"role": "system", "content": REPLY_BATCH_RULES},
+            {"role": "user", "content": "Posts (JSON):\n" + posts_json},
+        ],
+        response_format={"type": "json_object"},
+    )
+    data = json.loads(r.choices[0].message.content or "{}")
+    out: Dict[int, str] = {}
+    for it in data.get("replies") or []:
+        try:
+            i = int(it.get("i"))
+        except Exception:
+            continue
+        reply = str(it.get("reply") or "").strip()
+        if 0 <= i < len(jobs) and reply:
+            out[i] = reply
+    return out
+
+
+def openai_reply_texts(client: OpenAI, jobs: List[Tuple[str, str]]) -> List[str]:
+    """
+    jobs: [(post_text, tool_url), ...] -> 整形済み reply（jobs と同じ順）
+    キャッシュに無いものだけ REPLY_BATCH_SIZE 件ずつまとめて生成し、
+    取りこぼした分は1件ずつ openai_reply_text で埋める。
+    """
+    model = os.getenv("OPENAI_MODEL", "gpt-4o")
+    cache = load_reply_cache()
+    keys = [reply_cache_key(model, build_reply_prompt(t, u)) for t, u in jobs]
+    nears = [reply_near_key(model, t, u) for t, u in jobs]
+    misses = reply_cache_misses(cache, keys, nears)
+
+    size = max(1, REPLY_BATCH_SIZE)
+    chunks = [misses[start:start + size] for start in range(0, len(misses), size)]
+
+    def run(chunk: List[int]) -> Dict[int, str]:
+        try:
+            return openai_reply_batch(client, model, [jobs[i] for i in chunk])
+        except Exception:
+            return {}
+
+    # バッチ同士は独立しているので並列に投げる（キャッシュへの書き込みはメインスレッドで）
+    if chunks:
+        with ThreadPoolExecutor(max_workers=min(len(chunks), REPLY_BATCH_WORKERS)) as ex:
+            for chunk, got in zip(chunks, ex.map(run, chunks)):
+                for j, raw in got.items():
+                    reply_cache_put(cache, keys[chunk[j]], nears[chunk[j]], raw)
+
+    # バッチで取りこぼした分は1件ずつ（これも並列に）生成する
+    left = reply_cache_misses(cache, keys, nears)
+    if left:
+        with ThreadPoolExecutor(max_workers=min(len(left), REPLY_BATCH_WORKERS)) as ex:
+            prompts = [build_reply_prompt(*jobs[i]) for i in left]
+            for i, raw in zip(left, ex.map(lambda p: openai_reply_raw(client, model, p), prompts)):
+                reply_cache_put(cache, keys[i], nears[i], raw)
+
+    return [finalize_reply(reply_cache_get(cache, k, n), u) for (_, u), k, n in zip(jobs, keys, nears)]
+
+
 # -------------------------------
 # Collector: HN / Bluesky / X / Mastodon から「悩みっぽい投稿」を集める
 # -------------------------------
 
+SEARCH_WORKERS = max(1, int(os.getenv("OUTREACH_SEARCH_WORKERS", "8")))  # 検索の同時実行数
+
+# 検索 API（HN など）への接続を使い回す。並列検索から同時に使うので import 時に1つだけ作り、pool は SEARCH_WORKERS 本
+HTTP = requests.Session()
+HTTP.mount("https://", requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=SEARCH_WORKERS))
+
+
 def hn_search(query: str, days: int = 365, max_hits: int = 30) -> List[Dict[str, str]]:
     # HNはAlgolia検索（キー不要）
     # queryは例: "convert tool" "calculator"
@@ -149,7 +516,7 @@ def hn_search(query: str, days: int = 365, max_hits: int = 30) -> List[Dict[str,
         "hitsPerPage": max_hits,
     }
     try:
-        res = requests.get(url, params=params, timeout=20)
+        res = HTTP.get(url, params=params, timeout=20)
         res.raise_for_status()
         data = res.json()
     except Exception:
@@ -167,12 +534,52 @@ def hn_search(query: str, days: int = 365, max_hits: int = 30) -> List[Dict[str,
     return out
 
 
+_bsky_clients: Dict[Tuple[str, str], Any] = {}
+_bsky_lock = threading.Lock()
+
+# 実行をまたいで atproto のセッションを使い回す場合の保存先（未設定なら毎回パスワードでログイン）。
+# token が入るので、git add される goliath/ 配下ではなくリポジトリ外のパスを指定すること
+BSKY_SESSION_PATH = os.getenv("BSKY_SESSION_PATH", "")
+
+
+def bsky_login(handle: str, password: str) -> Any:
+    if BSKY_SESSION_PATH:
+        saved = read_json(BSKY_SESSION_PATH, {})
+        if isinstance(saved, dict) and saved.get("handle") == handle and saved.get("session"):
+            try:
+                c = BskyClient()
+                c.login(session_string=saved["session"])
+                return c
+            except Exception:
+                pass  # 期限切れなど → パスワードでログインし直す
+    c = BskyClient()
+    c.login(handle, password)
+    if BSKY_SESSION_PATH:
+        try:
+            data = json.dumps({"handle": handle, "session": c.export_session_string()}).encode("utf-8")
+            fd = os.open(BSKY_SESSION_PATH, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+        except Exception:
+            pass  # 保存できなくても今回のログインは有効
+    return c
+
+
+def bsky_client(handle: str, password: str) -> Any:
+    # 検索（並列）と返信のたびにログインし直さない。ログイン RPC は1回の実行で1回だけ
+    with _bsky_lock:
+        c = _bsky_clients.get((handle, password))
+        if c is None:
+            c = bsky_login(handle, password)
+            _bsky_clients[(handle, password)] = c
+        return c
+
+
 def bsky_search(handle: str, password: str, query: str, limit: int = 25) -> List[Dict[str, str]]:
     if not handle or not password or BskyClient is None:
         return []
     try:
-        c = BskyClient()
-        c.login(handle, password)
+        c = bsky_client(handle, password)
         # atproto raw call
         resp = c.app.bsky.feed.search_posts({"q": query, "limit": limit})
         out = []
@@ -204,8 +611,8 @@ def mastodon_search(api_base: str, access_token: str, query: str, limit: int = 2
             sid = st.get("id")
             content = st.get("content", "") or ""
             # HTMLタグ除去
-            text = re.sub(r"<[^>]+>", " ", content)
-            text = re.sub(r"\s{2,}", " ", text).strip()
+            text = HTML_TAG_RE.sub(" ", content)
+            text = MULTI_SPACE_RE.sub(" ", text).strip()
             url = st.get("url", "") or ""
             if sid and text:
                 out.append({"id": f"masto:{sid}", "text": text, "url": url, "status_id": str(sid)})
@@ -256,8 +663,7 @@ def reply_bluesky(handle: str, password: str, uri: str, cid: str, text: str) ->
     if not handle or not password or BskyClient is None:
         return False
     try:
-        c = BskyClient()
-        c.login(handle, password)
+        c = bsky_client(handle, password)
         # reply needs root/parent refs
         # simplest: create post with reply refs (atproto helper exists)
         c.send_post(
@@ -303,28 +709,50 @@ def reply_x(tweet_id: str, text: str) -> bool:
         return False
 
 
+_gh_session: Optional[requests.Session] = None
+
+
+def gh_session(pat: str) -> requests.Session:
+    # api.github.com への接続（TLS）を使い回す
+    global _gh_session
+    if _gh_session is None:
+        sess = requests.Session()
+        # POST は二重起票になり得るので、再送するのは「接続できなかった」時だけ
+        retry = Retry(total=3, connect=3, read=0, status=0, backoff_factor=0.3)
+        sess.mount("https://", requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=4, max_retries=retry))
+        sess.headers.update({"Accept": "application/vnd.github+json", "Content-Type": "application/json"})
+        _gh_session = sess
+    _gh_session.headers["Authorization"] = f"token {pat}"
+    return _gh_session
+
+
 def create_issue(title: str, body: str):
     pat = os.getenv("GH_PAT", "")
     repo = os.getenv("GITHUB_REPOSITORY", "")
     if not pat or not repo:
         return
     url = f"https://api.github.com/repos/{repo}/issues"
-    headers = {"Authorization": f"token {pat}", "Accept": "application/vnd.github+json"}
     payload = {"title": title, "body": body}
+    data = orjson.dumps(payload) if orjson is not None else json.dumps(payload, ensure_ascii=False).encode("utf-8")
     try:
-        requests.post(url, headers=headers, json=payload, timeout=20)
+        gh_session(pat).post(url, data=data, timeout=20)
     except Exception:
         pass
 
 
 def main():
-    db = read_json(DB_PATH, [])
+    db = read_db_head(DB_PATH)
     if not db:
         # ツールがまだ無ければ何もしない
         return
 
-    state = read_json(STATE_PATH, {"replied": {}, "last_run": ""})
-    replied = state.get("replied", {}) if isinstance(state.get("replied"), dict) else {}
+    state = read_json(STATE_PATH, {"last_run": ""})
+    # 旧形式（state["replied"] の dict）が残っていれば一度だけ JSONL へ移す
+    legacy = state.pop("replied", None)
+    if isinstance(legacy, dict) and legacy:
+        append_replied([dict(v, id=k) for k, v in legacy.items() if isinstance(v, dict)])
+    replied = load_replied()
+    new_replied: List[Dict[str, Any]] = []
 
     # 1回の実行での最大返信数（暴発防止）
     max_replies = int(os.getenv("OUTREACH_MAX_REPLIES", "5"))
@@ -341,95 +769,111 @@ def main():
         "checklist template"
     ]
 
-    candidates: List[Dict[str, Any]] = []
+    # 各検索はネットワーク待ちだけなので、まとめて並列に投げる
+    searches: List[Tuple[Any, ...]] = []
 
     # HN
     for q in queries[:3]:
-        candidates += hn_search(q, days=365, max_hits=25)
+        searches.append((hn_search, q, 365, 25))
 
     # Bluesky
     bsky_handle = os.getenv("BSKY_HANDLE", "")
     bsky_password = os.getenv("BSKY_PASSWORD", "")
     for q in queries[:2]:
-        candidates += bsky_search(bsky_handle, bsky_password, q, limit=25)
+        searches.append((bsky_search, bsky_handle, bsky_password, q, 25))
 
     # Mastodon
     masto_base = os.getenv("MASTODON_API_BASE", "")
     masto_token = os.getenv("MASTODON_ACCESS_TOKEN", "")
     for q in queries[:2]:
-        candidates += mastodon_search(masto_base, masto_token, q, limit=20)
+        searches.append((mastodon_search, masto_base, masto_token, q, 20))
 
     # X（まずは mentions から拾う。検索は権限次第で拡張）
     if x_search_and_reply_ready():
-        candidates += x_fetch_mentions()
+        searches.append((x_fetch_mentions,))
 
-    # 重複排除
+    # 結果は投入順に連結する（重複排除の「後勝ち」を直列版と同じにするため）
+    candidates: List[Dict[str, Any]] = []
+    with ThreadPoolExecutor(max_workers=SEARCH_WORKERS) as ex:
+        for got in ex.map(lambda call: call[0](*call[1:]), searches):
+            candidates += got
+
+    # 重複排除（前回までに返信済みのスレッドは id でも URL でもここで落とし、スコア計算や生成に回さない）
+    replied_urls = {(r.get("platform"), r.get("url")) for r in replied.values() if r.get("url")}
     uniq = {}
     for c in candidates:
         cid = c.get("id")
-        if not cid:
+        if not cid or cid in replied:
+            continue
+        if c.get("url") and (cid.split(":")[0], c.get("url")) in replied_urls:
             continue
         uniq[cid] = c
     candidates = list(uniq.values())
 
-    done = 0
-    report_lines = []
+    # 1) 返信対象を先に確定（ここでは API を呼ばない）
+    tool_index = build_tool_index(db)
+    min_score = float(os.getenv("OUTREACH_MIN_SCORE", "0.08"))
+    picked: List[Tuple[Dict[str, Any], str, str, float]] = []
     for c in candidates:
-        if done >= max_replies:
+        if len(picked) >= max_replies:
             break
         cid = c["id"]
-        if replied.get(cid):
-            continue
-
         text = c.get("text", "")
-        tool, score = pick_best_tool(db, text)
-        if not tool or score < float(os.getenv("OUTREACH_MIN_SCORE", "0.08")):
+        tool, score = pick_best_tool(db, text, tool_index)
+        if not tool or score < min_score:
             continue
 
-        tool_title = tool.get("title", "tool")
         tool_url = tool.get("public_url", "")
         if not tool_url:
             continue
 
         platform = cid.split(":")[0]
-        reply_text = openai_reply_text(client, platform, text, tool_title, tool_url)
+        if platform not in ("hn", "bsky", "masto", "x"):
+            continue
+        picked.append((c, platform, tool_url, score))
 
+    # 2) 返信文はまとめて生成（N 回ではなく ceil(N / REPLY_BATCH_SIZE) 回の API 呼び出し）
+    reply_texts = openai_reply_texts(client, [(c.get("text", ""), tool_url) for c, _, tool_url, _ in picked])
+
+    # 3) 投稿
+    done = 0
+    report = io.StringIO()  # issue 本文は1つのバッファに書き足す
+    for (c, platform, tool_url, score), reply_text in zip(picked, reply_texts):
+        cid = c["id"]
         ok = False
         if platform == "hn":
             # HNは自動投稿が強い制限＋炎上しやすいので「通知のみ」にする
             ok = True
-            report_lines.append(f"- HN candidate (notify only): {c.get('url')}\n  - suggested reply: {reply_text}")
+            report.write(f"- HN candidate (notify only): {c.get('url')}\n  - suggested reply: {reply_text}\n")
         elif platform == "bsky":
             ok = reply_bluesky(bsky_handle, bsky_password, c.get("uri",""), c.get("cid",""), reply_text)
-            report_lines.append(f"- Bluesky replied={ok}: {c.get('url')}\n  - tool: {tool_url}\n  - score: {score:.3f}")
+            report.write(f"- Bluesky replied={ok}: {c.get('url')}\n  - tool: {tool_url}\n  - score: {score:.3f}\n")
         elif platform == "masto":
             ok = reply_mastodon(masto_base, masto_token, c.get("status_id",""), reply_text)
-            report_lines.append(f"- Mastodon replied={ok}: {c.get('url')}\n  - tool: {tool_url}\n  - score: {score:.3f}")
+            report.write(f"- Mastodon replied={ok}: {c.get('url')}\n  - tool: {tool_url}\n  - score: {score:.3f}\n")
         elif platform == "x":
             ok = reply_x(c.get("tweet_id",""), reply_text)
-            report_lines.append(f"- X replied={ok}: {c.get('url')}\n  - tool: {tool_url}\n  - score: {score:.3f}")
-        else:
-            continue
+            report.write(f"- X replied={ok}: {c.get('url')}\n  - tool: {tool_url}\n  - score: {score:.3f}\n")
 
-        replied[cid] = {"at": now_utc_iso(), "platform": platform, "tool": tool_url, "score": score}
+        new_replied.append({"id": cid, "at": now_utc_iso(), "platform": platform, "url": c.get("url", ""),
+                            "tool": tool_url, "score": score})
         done += 1
 
-    state["replied"] = replied
+    append_replied(new_replied)
     state["last_run"] = now_utc_iso()
     write_json(STATE_PATH, state)
+    save_reply_cache()
 
-    if report_lines:
+    if report.tell():
         create_issue(
             title=f"[Goliath] Outreach report ({done} actions)",
-            body="\n".join(report_lines)
+            body=report.getvalue().rstrip("\n")
         )
 
 
 if __name__ == "__main__":
     main()
 # === Social-only outreach collection (no HN), with "days" filter ===
-from __future__ import annotations
-
 from datetime import datetime, timedelta, timezone
 from typing import Any, Dict, List, Optional
 
@@ -568,24 +1012,32 @@ def collect_mastodon_days(query: str, limit: int = 30, days: int = 730) -> List[
 
     return out[:limit]
 
+def _dedupe_by_url(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    De-dupe by URL, keeping first occurrence (dict preserves insertion order).
+    """
+    uniq: Dict[str, Dict[str, Any]] = {}
+    for it in items:
+        u = it.get("url")
+        if not u or u in uniq:
+            continue
+        uniq[u] = it
+    return list(uniq.values())
+
 def collect_social_only_days(query: str, limit_per_source: int = 30, days: int = 730) -> List[Dict[str, Any]]:
     """
     Social-only (Bluesky + Mastodon), NO HN fallback.
     """
     out: List[Dict[str, Any]] = []
-    out.extend(collect_bluesky_days(query, limit=limit_per_source, days=days))
-    out.extend(collect_mastodon_days(query, limit=limit_per_source, days=days))
-
-    # de-dupe by URL
-    seen = set()
-    uniq = []
-    for it in out:
-        u = it.get("url")
-        if not u or u in seen:
-            continue
-        seen.add(u)
-        uniq.append(it)
-    return uniq
+    with ThreadPoolExecutor(max_workers=2) as ex:
+        futs = [
+            ex.submit(collect_bluesky_days, query, limit=limit_per_source, days=days),
+            ex.submit(collect_mastodon_days, query, limit=limit_per_source, days=days),
+        ]
+        for fut in futs:
+            out.extend(fut.result())
+
+    return _dedupe_by_url(out)
 def _cutoff_iso(days: int) -> str:
     from datetime import datetime, timedelta, timezone
     dt = datetime.now(timezone.utc) - timedelta(days=max(1, days))
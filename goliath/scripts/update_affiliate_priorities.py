@@ -5,6 +5,12 @@ import datetime
 from typing import Any, Dict, List, Optional
 import requests
 
+# JSON (optional, faster)
+try:
+    import orjson
+except Exception:
+    orjson = None
+
 ROOT = "goliath"
 AFFILIATES_PATH = f"{ROOT}/affiliates.json"
 
@@ -30,14 +36,29 @@ CLICK_STATS_DAYS = int(os.getenv("CLICK_STATS_DAYS", "7"))
 
 def read_json(path: str, default: Any) -> Any:
     try:
-        with open(path, "r", encoding="utf-8") as f:
-            return json.load(f)
+        with open(path, "rb") as f:
+            raw = f.read()
+        if orjson is not None:
+            try:
+                return orjson.loads(raw)
+            except orjson.JSONDecodeError:
+                pass  # NaN 等は stdlib に任せる
+        return json.loads(raw.decode("utf-8"))
     except Exception:
         return default
 
 def write_json(path: str, obj: Any) -> None:
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(obj, f, ensure_ascii=False, indent=2)
+    # json.dump はトークンごとに細かく write するので、先に全体を bytes にして1回で書く
+    data = None
+    if orjson is not None:
+        try:
+            data = orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            pass  # 64bit 超の int など orjson 非対応 → stdlib
+    if data is None:
+        data = json.dumps(obj, ensure_ascii=False, indent=2).encode("utf-8")
+    with open(path, "wb") as f:
+        f.write(data)
 
 def clamp(lo: int, hi: int, x: float) -> int:
     return max(lo, min(hi, int(round(x))))
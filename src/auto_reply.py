@@ -5,13 +5,21 @@ from atproto import Client as BlueskyClient
 from mastodon import Mastodon
 import tweepy
 
+# Issue 本文のパース用（下書きごとに使うのでモジュール読み込み時に1回だけ compile）
+BLOCK_SPLIT_RE = re.compile(r'(?=\n?#\d+\s*\[)')
+PLATFORM_RE = re.compile(r'#\d+\s*\[([^\]]+)\]')
+URL_RE = re.compile(r'https?://[^\s\n]+')
+REPLY_RE = re.compile(r'返信文:\s*([\s\S]*?)(?=\n?#\d+|$)')
+BSKY_POST_URL_RE = re.compile(r'/profile/([^/]+)/post/([^/]+)')
+X_STATUS_RE = re.compile(r'/status/(\d+)')
+
 def parse_issue_body(body: str):
     print("=== Raw Issue Body Start ===")
     print(body)
     print("=== Raw Issue Body End ===")
     
     drafts = []
-    blocks = re.split(r'(?=\n?#\d+\s*\[)', body.strip())
+    blocks = BLOCK_SPLIT_RE.split(body.strip())
     print(f"Split into {len(blocks)} potential blocks")
     
     for i, block in enumerate(blocks):
@@ -21,21 +29,21 @@ def parse_issue_body(body: str):
         print(f"\n--- Processing Block {i+1} ---")
         print(block)
         
-        platform_match = re.search(r'#\d+\s*\[([^\]]+)\]', block, re.IGNORECASE)
+        platform_match = PLATFORM_RE.search(block)
         if platform_match:
             platform = platform_match.group(1).strip().upper()
             print(f"Found platform: {platform}")
         else:
             continue
         
-        url_match = re.search(r'https?://[^\s\n]+', block)
+        url_match = URL_RE.search(block)
         if url_match:
             target_url = url_match.group(0).rstrip('.').strip()
             print(f"Found URL: {target_url}")
         else:
             continue
         
-        reply_match = re.search(r'返信文:\s*([\s\S]*?)(?=\n?#\d+|$)', block, re.IGNORECASE)
+        reply_match = REPLY_RE.search(block)
         if reply_match:
             reply_text = reply_match.group(1).strip()
             if reply_text:
@@ -49,6 +57,38 @@ def parse_issue_body(body: str):
     print(f"\nParsed {len(drafts)} valid drafts")
     return drafts
 
+# ログイン済みクライアントは1回の実行中で使い回す（下書きごとにログインし直さない）
+_bsky_client = None
+_mastodon_client = None
+_x_api = None
+
+def get_bluesky_client(handle: str, app_password: str):
+    global _bsky_client
+    if _bsky_client is None:
+        client = BlueskyClient()
+        client.login(handle, app_password)
+        print("Bluesky login success")
+        _bsky_client = client
+    return _bsky_client
+
+def get_mastodon_client(access_token: str, instance_url: str):
+    global _mastodon_client
+    if _mastodon_client is None:
+        _mastodon_client = Mastodon(
+            access_token=access_token,
+            api_base_url=instance_url.rstrip('/')
+        )
+        print("Mastodon init success")
+    return _mastodon_client
+
+def get_x_api(consumer_key: str, consumer_secret: str, access_token: str, access_token_secret: str):
+    global _x_api
+    if _x_api is None:
+        auth = tweepy.OAuth1UserHandler(consumer_key, consumer_secret, access_token, access_token_secret)
+        _x_api = tweepy.API(auth)
+        print("X auth success")
+    return _x_api
+
 def post_to_bluesky(target_url: str, reply_text: str):
     handle = os.environ.get('BSKY_HANDLE')
     app_password = os.environ.get('BSKY_PASSWORD')
@@ -58,11 +98,9 @@ def post_to_bluesky(target_url: str, reply_text: str):
         return False
     
     try:
-        client = BlueskyClient()
-        client.login(handle, app_password)
-        print("Bluesky login success")
+        client = get_bluesky_client(handle, app_password)
         
-        match = re.search(r'/profile/([^/]+)/post/([^/]+)', target_url)
+        match = BSKY_POST_URL_RE.search(target_url)
         if not match:
             print(f"Invalid Bluesky URL: {target_url}")
             return False
@@ -91,11 +129,7 @@ def post_to_mastodon(target_url: str, reply_text: str):
         return False
     
     try:
-        mastodon = Mastodon(
-            access_token=access_token,
-            api_base_url=instance_url.rstrip('/')
-        )
-        print("Mastodon init success")
+        mastodon = get_mastodon_client(access_token, instance_url)
         
         status_id = target_url.split('/')[-1].split('?')[0]
         if not status_id.isdigit():
@@ -120,11 +154,9 @@ def post_to_x(target_url: str, reply_text: str):
         return False
     
     try:
-        auth = tweepy.OAuth1UserHandler(consumer_key, consumer_secret, access_token, access_token_secret)
-        api = tweepy.API(auth)
-        print("X auth success")
+        api = get_x_api(consumer_key, consumer_secret, access_token, access_token_secret)
         
-        match = re.search(r'/status/(\d+)', target_url)
+        match = X_STATUS_RE.search(target_url)
         if not match:
             print(f"Invalid X URL: {target_url}")
             return False
@@ -1,7 +1,7 @@
 import os
 import json
 import pathlib
-import datetime
+import time
 import urllib.request
 
 def _read_tail(path: str, max_chars: int = 12000) -> str:
@@ -30,7 +30,7 @@ def main() -> int:
     wf_name  = os.getenv("GITHUB_WORKFLOW", "workflow")
     run_url  = f"{server}/{repo}/actions/runs/{run_id}" if run_id else "(no run url)"
 
-    now = datetime.datetime.utcnow().strftime("%Y-%m-%d %H:%M:%SZ")
+    now = time.strftime("%Y-%m-%d %H:%M:%SZ", time.gmtime())
     title = f"Goliath Report: {now}"
 
     log_tail = _read_tail("run_log.txt")